@@ -552,7 +552,7 @@ async def workflow_optimize_inventory_stream(
             if include_all_products:
                 products = inventory_service.get_products(limit=500)
             else:
-                products = inventory_service.get_low_stock_products()
+                products = list(inventory_service.get_low_stock_products())
             
             yield f"data: {json.dumps({'event': 'products_loaded', 'count': len(products)})}\n\n"
             await asyncio.sleep(0.1)
@@ -15,6 +15,7 @@ Usage:
 """
 
 import os
+import math
 import pickle
 import logging
 from pathlib import Path
@@ -175,8 +176,6 @@ class DemandForecasterService:
         stats: dict
     ) -> DemandForecast:
         """Forecast using trained ML model."""
-        import numpy as np
-        
         avg_qty = stats.get('avg_quantity', 0)
         std_qty = stats.get('std_quantity', 0)
         total_orders = stats.get('total_orders', 0)
@@ -185,7 +184,7 @@ class DemandForecasterService:
         predicted_total = predicted_daily * days
         
         # Confidence intervals
-        margin = std_qty * 1.5 * np.sqrt(days)
+        margin = std_qty * 1.5 * math.sqrt(days)
         lower = max(0, predicted_total - margin)
         upper = predicted_total + margin
         
@@ -204,8 +203,6 @@ class DemandForecasterService:
     
     def _statistical_forecast(self, asin: str, days: int, stats: dict) -> DemandForecast:
         """Forecast using historical statistics."""
-        import numpy as np
-        
         avg_qty = stats.get('avg_quantity', 0)
         std_qty = stats.get('std_quantity', avg_qty * 0.3)
         total_orders = stats.get('total_orders', 0)
@@ -214,7 +211,7 @@ class DemandForecasterService:
         predicted_daily = avg_qty / 7
         predicted_total = avg_qty * (days / 7)
         
-        margin = std_qty * 2 * np.sqrt(days / 7)
+        margin = std_qty * 2 * math.sqrt(days / 7)
         lower = max(0, predicted_total - margin)
         upper = predicted_total + margin
         
@@ -3,7 +3,7 @@ Database connection management and utilities.
 Provides helper functions for database operations.
 """
 from sqlalchemy import text
-from .config import engine, SessionLocal, Base
+from .config import get_engine, get_session_factory, Base
 from . import models  # Import models to register them with Base
 
 
@@ -14,14 +14,14 @@ def create_tables():
     the exact SQL in schema.sql. For production, deploy schema.sql directly.
     """
     print("Creating tables from SQLAlchemy models...")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     print("✅ Tables created successfully!")
 
 
 def drop_tables():
     """Drop all tables. USE WITH CAUTION!"""
     print("⚠️  Dropping all tables...")
-    Base.metadata.drop_all(bind=engine)
+    Base.metadata.drop_all(bind=get_engine())
     print("✅ Tables dropped!")
 
 
@@ -38,7 +38,7 @@ def execute_sql_file(sql_file_path: str):
     # Split by GO statements (SQL Server batch separator)
     batches = sql_script.split('GO')
 
-    with engine.begin() as connection:
+    with get_engine().begin() as connection:
         for i, batch in enumerate(batches, 1):
             batch = batch.strip()
             if batch:  # Skip empty batches
@@ -56,7 +56,7 @@ def get_table_counts():
     """Get row counts for all tables"""
     counts = {}
 
-    with SessionLocal() as session:
+    with get_session_factory()() as session:
         counts['suppliers'] = session.query(models.Supplier).count()
         counts['products'] = session.query(models.Product).count()
         counts['purchase_orders'] = session.query(models.PurchaseOrder).count()
@@ -69,7 +69,7 @@ def validate_foreign_keys():
     """Validate all foreign key relationships"""
     issues = []
 
-    with SessionLocal() as session:
+    with get_session_factory()() as session:
         # Check products -> suppliers
         products_without_supplier = session.query(models.Product).filter(
             models.Product.supplier_id.isnot(None)
@@ -3,19 +3,23 @@
 Create database tables using pymssql (TDS protocol)
 """
 
-from dotenv import load_dotenv
 import os
+import sys
+
 import pymssql
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Environment is loaded once by the shared database config
+from database.config import get_env
 
 
 def create_tables():
     """Create the 4 database tables using TDS connection"""
 
-    server = os.getenv("AZURE_SQL_SERVER")
-    database = os.getenv("AZURE_SQL_DATABASE")
+    server = get_env("AZURE_SQL_SERVER")
+    database = get_env("AZURE_SQL_DATABASE")
 
     print("🔄 Connecting to Azure SQL Database...")
     print(f"Server: {server}")
@@ -74,7 +78,7 @@ def create_tables():
             price_last_updated DATETIME2,
             quantity_on_hand INT NOT NULL DEFAULT 0,
             quantity_reserved INT DEFAULT 0,
-            quantity_available AS (quantity_on_hand - quantity_reserved),
+            quantity_available AS (quantity_on_hand - quantity_reserved) PERSISTED,
             reorder_point INT DEFAULT 10,
             reorder_quantity INT DEFAULT 50,
             lead_time_days INT DEFAULT 7,
@@ -132,6 +136,9 @@ def create_tables():
         cursor.execute("CREATE INDEX idx_supplier_name ON suppliers(supplier_name);")
         cursor.execute("CREATE INDEX idx_product_brand ON products(brand);")
         cursor.execute("CREATE INDEX idx_product_supplier ON products(supplier_id);")
+        cursor.execute(
+            "CREATE INDEX idx_product_qty_available ON products(quantity_available) INCLUDE (reorder_point, is_active);"
+        )
         cursor.execute("CREATE INDEX idx_po_supplier ON purchase_orders(supplier_id);")
         cursor.execute("CREATE INDEX idx_po_status ON purchase_orders(status);")
         cursor.execute(
@@ -0,0 +1,23 @@
+-- ============================================================================
+-- Migration: Trigram index for product title search
+-- Date: 2026-10-16
+-- Description: Lets ILIKE '%term%' on products.title (product search, Amazon
+--              price sync) use a GIN index instead of a sequential scan
+-- Database: PostgreSQL (Neon)
+-- ============================================================================
+
+-- Step 1: Enable trigram operators
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Step 2: GIN trigram index on title
+-- CONCURRENTLY avoids blocking writes; run outside a transaction block
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_product_title_trgm
+    ON products USING gin (title gin_trgm_ops);
+
+-- ============================================================================
+-- Rollback Script (if needed)
+-- ============================================================================
+
+/*
+DROP INDEX CONCURRENTLY IF EXISTS idx_product_title_trgm;
+*/
@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migration: Compound index for a supplier's active products
+-- Date: 2026-10-16
+-- Description: Supports GET /suppliers/{supplier_id}, which now selects only
+--              active products of the supplier in SQL
+-- Database: PostgreSQL (Neon)
+-- ============================================================================
+
+-- CONCURRENTLY avoids blocking writes; run outside a transaction block
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_product_supplier_active
+    ON products (supplier_id, is_active);
+
+-- ============================================================================
+-- Rollback Script (if needed)
+-- ============================================================================
+
+/*
+DROP INDEX CONCURRENTLY IF EXISTS idx_product_supplier_active;
+*/
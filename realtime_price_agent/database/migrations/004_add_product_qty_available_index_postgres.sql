@@ -0,0 +1,20 @@
+-- ============================================================================
+-- Migration: Covering index for low-stock lookups
+-- Date: 2026-10-16
+-- Description: Lets low-stock and reorder queries filter on
+--              products.quantity_available and read reorder_point/is_active
+--              from the index instead of scanning the table
+-- Database: PostgreSQL (Neon)
+-- ============================================================================
+
+-- CONCURRENTLY avoids blocking writes; run outside a transaction block
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_product_qty_available
+    ON products (quantity_available) INCLUDE (reorder_point, is_active);
+
+-- ============================================================================
+-- Rollback Script (if needed)
+-- ============================================================================
+
+/*
+DROP INDEX CONCURRENTLY IF EXISTS idx_product_qty_available;
+*/
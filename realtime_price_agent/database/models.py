@@ -14,6 +14,7 @@ from sqlalchemy import (
     Computed,
     Text,
 )
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .config import Base
@@ -88,7 +89,12 @@ class Product(Base):
     # Stock Levels
     quantity_on_hand = Column(Integer, nullable=False, default=0)
     quantity_reserved = Column(Integer, nullable=False, default=0)
-    # quantity_available is computed column in SQL
+    # quantity_available is a persisted, indexed computed column in SQL
+    _quantity_available = Column(
+        "quantity_available",
+        Integer,
+        Computed("quantity_on_hand - quantity_reserved", persisted=True),
+    )
 
     # Reordering Rules
     reorder_point = Column(Integer, nullable=False, default=10)
@@ -109,11 +115,16 @@ class Product(Base):
     supplier = relationship("Supplier", back_populates="products")
     order_items = relationship("PurchaseOrderItem", back_populates="product")
 
-    @property
+    @hybrid_property
     def quantity_available(self):
         """Computed property: available = on_hand - reserved"""
         return self.quantity_on_hand - self.quantity_reserved
 
+    @quantity_available.expression
+    def quantity_available(cls):
+        """Query against the indexed computed column"""
+        return cls._quantity_available
+
     @property
     def needs_reorder(self):
         """Check if product is below reorder point"""
@@ -39,7 +39,7 @@ CREATE TABLE products (
     price_last_updated DATETIME2,
     quantity_on_hand INT NOT NULL DEFAULT 0,
     quantity_reserved INT DEFAULT 0,
-    quantity_available AS (quantity_on_hand - quantity_reserved),
+    quantity_available AS (quantity_on_hand - quantity_reserved) PERSISTED,
     reorder_point INT DEFAULT 10,
     reorder_quantity INT DEFAULT 50,
     lead_time_days INT DEFAULT 7,
@@ -90,6 +90,7 @@ CREATE TABLE purchase_order_items (
 CREATE INDEX idx_supplier_name ON suppliers(supplier_name);
 CREATE INDEX idx_product_brand ON products(brand);
 CREATE INDEX idx_product_supplier ON products(supplier_id);
+CREATE INDEX idx_product_qty_available ON products(quantity_available) INCLUDE (reorder_point, is_active);
 CREATE INDEX idx_po_supplier ON purchase_orders(supplier_id);
 CREATE INDEX idx_po_status ON purchase_orders(status);
 CREATE INDEX idx_poi_po_number ON purchase_order_items(po_number);
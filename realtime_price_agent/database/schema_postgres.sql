@@ -87,7 +87,11 @@ CREATE TABLE IF NOT EXISTS purchase_order_items (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_supplier_name ON suppliers(supplier_name);
 CREATE INDEX IF NOT EXISTS idx_product_brand ON products(brand);
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_product_title_trgm ON products USING gin (title gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_product_supplier ON products(supplier_id);
+CREATE INDEX IF NOT EXISTS idx_product_supplier_active ON products(supplier_id, is_active);
+CREATE INDEX IF NOT EXISTS idx_product_qty_available ON products(quantity_available) INCLUDE (reorder_point, is_active);
 CREATE INDEX IF NOT EXISTS idx_po_supplier ON purchase_orders(supplier_id);
 CREATE INDEX IF NOT EXISTS idx_po_status ON purchase_orders(status);
 CREATE INDEX IF NOT EXISTS idx_poi_po_number ON purchase_order_items(po_number);
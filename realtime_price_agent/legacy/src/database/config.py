@@ -33,14 +33,27 @@ def get_db_engine():
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL is required")
 
+    dialect_options = {}
+    if str(DATABASE_URL).startswith("postgres"):
+        # TCP keepalives stop idle pooled connections being dropped by Neon
+        connect_args = {"keepalives": 1, "keepalives_idle": 30}
+        if "sslmode" not in str(DATABASE_URL):
+            connect_args["sslmode"] = "require"  # Neon requires TLS
+        dialect_options["connect_args"] = connect_args
+    if str(DATABASE_URL).startswith("mssql+pyodbc"):
+        # Bind executemany parameters as arrays (one round trip per batch)
+        dialect_options["fast_executemany"] = True
+
     # Create SQLAlchemy engine
     engine = create_engine(
         str(DATABASE_URL),
         echo=False,  # Set to True for SQL debugging
-        pool_size=5,
-        max_overflow=10,
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=30,  # Wait up to 30s for a free connection
         pool_pre_ping=True,  # Verify connections before using
         pool_recycle=3600,  # Recycle connections after 1 hour
+        **dialect_options,
     )
 
     return engine
@@ -2,6 +2,7 @@
 Database connection management and utilities.
 Provides helper functions for database operations.
 """
+from contextlib import contextmanager
 from sqlalchemy import text
 from .config import engine, SessionLocal, Base
 from . import models  # Import models to register them with Base
@@ -52,6 +53,90 @@ def execute_sql_file(sql_file_path: str):
     print("✅ SQL script executed successfully!")
 
 
+def truncate_tables(session, *tables: str):
+    """
+    Empty tables ahead of a full reload.
+    Uses TRUNCATE on Postgres; SQL Server refuses to truncate tables that are
+    referenced by foreign keys, so other dialects fall back to DELETE.
+
+    No CASCADE: a table that references one of `tables` (e.g.
+    purchase_order_items -> products) is truncated along with it only when it
+    is already empty; if it holds rows this raises instead, just as the
+    DELETE path fails on the foreign key.
+    """
+    if session.get_bind().dialect.name != 'postgresql':
+        for table in tables:
+            session.execute(text(f"DELETE FROM {table}"))
+        return
+
+    targets = list(tables)
+    pending = list(tables)
+    while pending:
+        # Tables with a foreign key into the current set (Postgres requires
+        # them in the same TRUNCATE)
+        dependents = session.execute(
+            text(
+                "SELECT DISTINCT c.conrelid::regclass::text FROM pg_constraint c "
+                "WHERE c.contype = 'f' AND c.confrelid IN "
+                "(SELECT to_regclass(t) FROM unnest(CAST(:tables AS text[])) AS t)"
+            ),
+            {'tables': pending}
+        ).scalars().all()
+        pending = [table for table in dependents if table not in targets]
+        for table in pending:
+            if session.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table})")).scalar():
+                raise RuntimeError(
+                    f"Cannot truncate {', '.join(tables)}: {table} still references it. "
+                    f"Empty {table} first."
+                )
+        targets.extend(pending)
+
+    session.execute(text(f"TRUNCATE TABLE {', '.join(targets)} RESTART IDENTITY"))
+
+
+@contextmanager
+def bulk_load(session, table: str, indexes: list):
+    """
+    Suspend secondary indexes and FK checks on a table during a full reload.
+    Indexes are rebuilt and constraints re-validated on exit.
+    On Postgres the indexes are dropped and recreated from their definitions;
+    FK checks stay on there since disabling them requires superuser.
+    """
+    dialect = session.get_bind().dialect.name
+    index_defs = []
+
+    if dialect == 'mssql':
+        for index in indexes:
+            session.execute(text(f"ALTER INDEX {index} ON {table} DISABLE"))
+        session.execute(text(f"ALTER TABLE {table} NOCHECK CONSTRAINT ALL"))
+    elif dialect == 'postgresql':
+        index_defs = session.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE tablename = :table AND indexname = ANY(:indexes)"
+            ),
+            {'table': table, 'indexes': list(indexes)}
+        ).scalars().all()
+        for index in indexes:
+            session.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    session.commit()
+
+    try:
+        yield
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if dialect == 'mssql':
+            for index in indexes:
+                session.execute(text(f"ALTER INDEX {index} ON {table} REBUILD"))
+            session.execute(text(f"ALTER TABLE {table} WITH CHECK CHECK CONSTRAINT ALL"))
+        else:
+            for index_def in index_defs:
+                session.execute(text(index_def))
+        session.commit()
+
+
 def get_table_counts():
     """Get row counts for all tables"""
     counts = {}
@@ -4,20 +4,39 @@ Generate 500-1000 inventory records from Amazon CSV with realistic stock levels
 """
 import sys
 import os
+import re
+import time
+import argparse
+from collections import defaultdict
+from contextlib import nullcontext
+from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from src.database.config import SessionLocal
+from src.database.connection import bulk_load, truncate_tables
 from src.database.models import Product, Supplier
+from sqlalchemy import func
+import numpy as np
 import pandas as pd
 import requests
-from io import StringIO
 import random
 from datetime import datetime
 
 CSV_URL = "https://raw.githubusercontent.com/luminati-io/eCommerce-dataset-samples/refs/heads/main/amazon-products.csv"
 
+# Only the columns we use, read as strings; stop parsing after CSV_MAX_ROWS
+CSV_COLUMNS = ['asin', 'title', 'brand', 'description', 'final_price']
+CSV_MAX_ROWS = 1000
+
+# Local copy of the CSV, re-downloaded once it is older than a day
+CSV_CACHE_PATH = Path('~/.cache/amazon-products.csv').expanduser()
+CSV_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Secondary indexes suspended during --fast-bulk reloads
+PRODUCT_INDEXES = ['idx_product_brand', 'idx_product_supplier']
+
 # Category keywords for supplier mapping
 SUPPLIER_KEYWORDS = {
     'TECH': ['electronic', 'computer', 'phone', 'tablet', 'camera', 'audio', 'headphone', 'speaker', 'charger', 'cable'],
@@ -29,81 +48,127 @@ SUPPLIER_KEYWORDS = {
     'GENERAL': []  # Catch-all
 }
 
+# One compiled keyword pattern per category (GENERAL has none)
+CATEGORY_PATTERNS = {
+    prefix: re.compile('|'.join(map(re.escape, keywords)))
+    for prefix, keywords in SUPPLIER_KEYWORDS.items()
+    if keywords
+}
 
-def match_supplier(title: str, brand: str, suppliers: list) -> str:
-    """Match product to supplier based on title/brand keywords"""
-    text = f"{title} {brand}".lower()
 
-    # Check each supplier category
-    for prefix, keywords in SUPPLIER_KEYWORDS.items():
-        if any(keyword in text for keyword in keywords):
-            # Find supplier with matching prefix
-            matching = [s for s in suppliers if s.supplier_id.startswith(prefix)]
-            if matching:
-                return random.choice(matching).supplier_id
+def group_suppliers_by_prefix(suppliers: list) -> dict:
+    """Bucket supplier IDs by their category prefix (e.g. TECH-001 -> TECH)"""
+    by_prefix = defaultdict(list)
+    for s in suppliers:
+        by_prefix[s.supplier_id.split('-')[0]].append(s.supplier_id)
+    return by_prefix
 
-    # Default to GENERAL supplier
-    general = [s for s in suppliers if s.supplier_id.startswith('GENERAL')]
-    return general[0].supplier_id if general else suppliers[0].supplier_id
 
+def assign_suppliers(df: pd.DataFrame, by_prefix: dict) -> pd.Series:
+    """Match every product to a supplier based on title/brand keywords"""
+    text = (df['title'].fillna('') + ' ' + df['brand'].fillna('')).str.lower()
 
-def generate_stock_level() -> dict:
-    """Generate realistic stock levels with distribution"""
-    distribution = random.random()
+    # Assign categories in priority order; first matching category wins
+    category = pd.Series(pd.NA, index=df.index, dtype='object')
+    for prefix, pattern in CATEGORY_PATTERNS.items():
+        if not by_prefix.get(prefix):
+            continue
+        mask = text.str.contains(pattern, na=False)
+        category[mask & category.isna()] = prefix
 
-    if distribution < 0.05:  # 5% out of stock
-        on_hand = 0
-    elif distribution < 0.20:  # 15% low stock
-        on_hand = random.randint(1, 50)
-    elif distribution < 0.80:  # 60% normal stock
-        on_hand = random.randint(50, 200)
-    else:  # 20% high stock
-        on_hand = random.randint(200, 500)
+    # Default to GENERAL supplier
+    general = by_prefix.get('GENERAL')
+    default_id = general[0] if general else next(iter(by_prefix.values()))[0]
+
+    return category.map(
+        lambda c: default_id if pd.isna(c) else random.choice(by_prefix[c])
+    )
+
+
+def generate_stock_levels(rng: np.random.Generator, n: int) -> dict:
+    """Generate realistic stock levels with distribution for n products"""
+    distribution = rng.random(n)
+
+    on_hand = np.select(
+        [
+            distribution < 0.05,  # 5% out of stock
+            distribution < 0.20,  # 15% low stock
+            distribution < 0.80,  # 60% normal stock
+        ],
+        [
+            0,
+            rng.integers(1, 51, n),
+            rng.integers(50, 201, n),
+        ],
+        default=rng.integers(200, 501, n),  # 20% high stock
+    )
 
     # Reserved is 0-20% of on-hand
-    reserved = int(on_hand * random.uniform(0, 0.20)) if on_hand > 0 else 0
+    reserved = (on_hand * rng.uniform(0, 0.20, n)).astype(int)
 
     # Reorder point is 10-30% of typical stock level
-    reorder_point = max(10, int(on_hand * random.uniform(0.10, 0.30)))
+    reorder_point = np.maximum(10, (on_hand * rng.uniform(0.10, 0.30, n)).astype(int))
 
     # Reorder quantity is 2-5x reorder point
-    reorder_quantity = int(reorder_point * random.uniform(2, 5))
+    reorder_quantity = (reorder_point * rng.uniform(2, 5, n)).astype(int)
 
     return {
         'quantity_on_hand': on_hand,
         'quantity_reserved': reserved,
         'reorder_point': reorder_point,
         'reorder_quantity': reorder_quantity,
-        'lead_time_days': random.randint(5, 14)
+        'lead_time_days': rng.integers(5, 15, n)
     }
 
 
-def calculate_costs(market_price: float) -> dict:
-    """Calculate unit cost and last purchase price based on market price"""
-    if market_price <= 0:
-        return {'unit_cost': 0.0, 'last_purchase_price': 0.0}
+def calculate_costs(rng: np.random.Generator, market_prices: np.ndarray) -> dict:
+    """Calculate unit cost and last purchase price based on market prices"""
+    n = len(market_prices)
 
     # Unit cost is 40-70% of market price (realistic margin)
-    unit_cost = round(market_price * random.uniform(0.40, 0.70), 2)
+    unit_cost = np.round(market_prices * rng.uniform(0.40, 0.70, n), 2)
+    unit_cost = np.where(market_prices > 0, unit_cost, 0.0)
 
     # Last purchase price is unit_cost ± 10%
-    last_purchase = round(unit_cost * random.uniform(0.90, 1.10), 2)
+    last_purchase = np.round(unit_cost * rng.uniform(0.90, 1.10, n), 2)
 
     return {
         'unit_cost': unit_cost,
         'last_purchase_price': last_purchase,
-        'market_price': market_price,
+        'market_price': market_prices,
         'price_last_updated': datetime.utcnow()
     }
 
 
-def main():
+def load_csv(refresh: bool = False) -> pd.DataFrame:
+    """Load the product CSV, using the local cache when it is fresh"""
+    cache_fresh = (
+        CSV_CACHE_PATH.exists()
+        and time.time() - CSV_CACHE_PATH.stat().st_mtime < CSV_CACHE_TTL_SECONDS
+    )
+
+    if refresh or not cache_fresh:
+        print(f"  Fetching CSV from {CSV_URL[:50]}...")
+        response = requests.get(CSV_URL, timeout=60)
+        response.raise_for_status()
+        CSV_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CSV_CACHE_PATH.write_bytes(response.content)
+    else:
+        print(f"  Using cached CSV at {CSV_CACHE_PATH}")
+
+    return pd.read_csv(
+        CSV_CACHE_PATH,
+        usecols=lambda c: c.strip().lower() in CSV_COLUMNS,
+        dtype='string',
+        nrows=CSV_MAX_ROWS,
+    )
+
+
+def main(fast_bulk: bool = False, refresh: bool = False):
     print("📦 Generating inventory data from Amazon CSV...")
 
     # Load CSV
-    print(f"  Fetching CSV from {CSV_URL[:50]}...")
-    response = requests.get(CSV_URL)
-    df = pd.read_csv(StringIO(response.text))
+    df = load_csv(refresh=refresh)
 
     # Normalize columns
     df.columns = df.columns.str.strip().str.lower()
@@ -131,7 +196,14 @@ def main():
 
     # Limit to 500-1000 products
     target_count = random.randint(500, 1000)
-    df = df.head(target_count)
+    df = df.head(target_count).copy()
+
+    # Truncate text to column lengths once instead of per row
+    df['title'] = df['title'].astype('string').str.slice(0, 500)
+    df['brand'] = df['brand'].astype('string').str.slice(0, 100)
+    df['description'] = (
+        df['description'].astype('string').str.slice(0, 1000).replace('', pd.NA)
+    )
 
     print(f"  📊 Generating inventory for {len(df)} products...")
 
@@ -143,52 +215,51 @@ def main():
             print("❌ No suppliers found! Run 01_generate_suppliers.py first.")
             return
 
-        # Clear existing products
-        session.query(Product).delete()
-        session.commit()
-
-        products_created = 0
-
-        for idx, row in df.iterrows():
-            # Match to supplier
-            supplier_id = match_supplier(row['title'], row['brand'], suppliers)
-
-            # Generate stock and pricing
-            stock = generate_stock_level()
-            costs = calculate_costs(row['price_cleaned'])
-
-            # Create product
-            product = Product(
-                asin=str(row['asin']),
-                title=str(row['title'])[:500],  # Limit length
-                brand=str(row['brand'])[:100],
-                description=str(row['description'])[:1000] if row['description'] else None,
-                supplier_id=supplier_id,
-                **stock,
-                **costs
+        bulk = bulk_load(session, 'products', PRODUCT_INDEXES) if fast_bulk else nullcontext()
+        with bulk:
+            # Clear existing products
+            truncate_tables(session, 'products')
+            session.commit()
+
+            # Match products to suppliers
+            by_prefix = group_suppliers_by_prefix(suppliers)
+            df['supplier_id'] = assign_suppliers(df, by_prefix)
+
+            # Generate stock and pricing for all products at once
+            rng = np.random.default_rng()
+            stock = pd.DataFrame(generate_stock_levels(rng, len(df)), index=df.index)
+            costs = pd.DataFrame(
+                calculate_costs(rng, df['price_cleaned'].to_numpy(dtype=float)),
+                index=df.index
             )
 
-            session.add(product)
-            products_created += 1
-
-            if products_created % 100 == 0:
-                print(f"    ... {products_created} products created")
-
-        session.commit()
+            records = pd.concat(
+                [df[['asin', 'title', 'brand', 'description', 'supplier_id']], stock, costs],
+                axis=1
+            )
+            # Plain Python values, with None for missing descriptions
+            records = records.astype(object).where(records.notna(), None)
+            product_rows = records.to_dict('records')
+
+            # Single executemany (array-bound on pyodbc via fast_executemany)
+            session.bulk_insert_mappings(Product, product_rows)
+            session.commit()
+            products_created = len(product_rows)
         print(f"\n✅ Successfully created {products_created} products!")
 
         # Show distribution stats
-        all_products = session.query(Product).all()
-        out_of_stock = sum(1 for p in all_products if p.quantity_on_hand == 0)
-        low_stock = sum(1 for p in all_products if 0 < p.quantity_on_hand <= 50)
-        normal_stock = sum(1 for p in all_products if 50 < p.quantity_on_hand <= 200)
-        high_stock = sum(1 for p in all_products if p.quantity_on_hand > 200)
+        qty = Product.quantity_on_hand
+        total = session.query(func.count(Product.asin)).scalar()
+        out_of_stock = session.query(func.count(Product.asin)).filter(qty == 0).scalar()
+        low_stock = session.query(func.count(Product.asin)).filter(qty > 0, qty <= 50).scalar()
+        normal_stock = session.query(func.count(Product.asin)).filter(qty > 50, qty <= 200).scalar()
+        high_stock = session.query(func.count(Product.asin)).filter(qty > 200).scalar()
 
         print(f"\n📊 Stock Distribution:")
-        print(f"  Out of stock: {out_of_stock} ({out_of_stock/len(all_products)*100:.1f}%)")
-        print(f"  Low stock (1-50): {low_stock} ({low_stock/len(all_products)*100:.1f}%)")
-        print(f"  Normal (51-200): {normal_stock} ({normal_stock/len(all_products)*100:.1f}%)")
-        print(f"  High (200+): {high_stock} ({high_stock/len(all_products)*100:.1f}%)")
+        print(f"  Out of stock: {out_of_stock} ({out_of_stock/total*100:.1f}%)")
+        print(f"  Low stock (1-50): {low_stock} ({low_stock/total*100:.1f}%)")
+        print(f"  Normal (51-200): {normal_stock} ({normal_stock/total*100:.1f}%)")
+        print(f"  High (200+): {high_stock} ({high_stock/total*100:.1f}%)")
 
     except Exception as e:
         session.rollback()
@@ -199,4 +270,16 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--fast-bulk',
+        action='store_true',
+        help='Suspend product indexes and FK checks during the reload'
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Re-download the product CSV even if the cached copy is fresh'
+    )
+    args = parser.parse_args()
+    main(fast_bulk=args.fast_bulk, refresh=args.refresh)
@@ -6,16 +6,26 @@ Simplified order generation using statistical parameters
 import sys
 import os
 import json
+import argparse
+from contextlib import nullcontext
 import numpy as np
 from datetime import datetime, timedelta
 import random
+from collections import defaultdict
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from src.database.config import SessionLocal
+from src.database.connection import bulk_load, truncate_tables
 from src.database.models import Product, Supplier, PurchaseOrder, PurchaseOrderItem
 
+# Secondary indexes suspended during --fast-bulk reloads
+ORDER_INDEXES = {
+    "purchase_orders": ["idx_po_supplier", "idx_po_status"],
+    "purchase_order_items": ["idx_poi_po_number", "idx_poi_asin"],
+}
+
 
 def load_order_parameters():
     """Load statistical parameters"""
@@ -47,7 +57,7 @@ def generate_quantity_for_price_tier(price_tier: str, price_tiers: dict) -> int:
     return max(1, min(config["max_quantity"], int(quantity)))
 
 
-def generate_orders():
+def generate_orders(fast_bulk: bool = False):
     """Generate purchase orders using statistical parameters"""
     print("📋 Generating purchase orders with statistical parameters...")
 
@@ -63,31 +73,36 @@ def generate_orders():
         products = session.query(Product).all()
         print(f"Found {len(suppliers)} suppliers and {len(products)} products")
 
-        # Clear existing orders
-        session.query(PurchaseOrderItem).delete()
-        session.query(PurchaseOrder).delete()
-        session.commit()
+        # Group products by supplier once
+        by_supplier = defaultdict(list)
+        for p in products:
+            by_supplier[p.supplier_id].append(p)
+
+        rng = np.random.default_rng()
 
         # Generate orders
         num_orders = 10  # Start with 10 for testing
         orders_created = 0
+        po_rows = []
+        item_rows = []
 
         for i in range(num_orders):
             # Select random supplier
             supplier = random.choice(suppliers)
 
             # Get supplier's products
-            supplier_products = [
-                p for p in products if p.supplier_id == supplier.supplier_id
-            ]
-            if not supplier_products:
-                supplier_products = products[:20]  # Fallback
+            supplier_products = (
+                by_supplier.get(supplier.supplier_id) or products[:20]  # Fallback
+            )
 
             # Select 2-8 products for this order
-            num_items = random.randint(2, 8)
-            order_products = random.sample(
-                supplier_products, min(num_items, len(supplier_products))
+            num_items = int(rng.integers(2, 9))
+            picks = rng.choice(
+                len(supplier_products),
+                size=min(num_items, len(supplier_products)),
+                replace=False,
             )
+            order_products = [supplier_products[j] for j in picks]
 
             # Generate order date (last 90 days)
             days_ago = random.randint(0, 90)
@@ -119,7 +134,7 @@ def generate_orders():
                 )
 
                 # Create order item
-                item = PurchaseOrderItem(
+                item = dict(
                     po_number=po_number,
                     asin=product.asin,
                     quantity_ordered=quantity,
@@ -150,7 +165,7 @@ def generate_orders():
                 actual_delivery = None
 
             # Create purchase order
-            po = PurchaseOrder(
+            po_rows.append(dict(
                 po_number=po_number,
                 supplier_id=supplier.supplier_id,
                 order_date=order_date,
@@ -159,12 +174,8 @@ def generate_orders():
                 total_cost=total_cost,
                 status=status,
                 created_by="system",
-            )
-
-            # Add to session
-            session.add(po)
-            for item in order_items:
-                session.add(item)
+            ))
+            item_rows.extend(order_items)
 
             orders_created += 1
             print(f"  Created order {orders_created} with {len(order_items)} items")
@@ -174,7 +185,20 @@ def generate_orders():
                 break
 
         print("Committing to database...")
-        session.commit()
+        if fast_bulk:
+            bulk = bulk_load(session, "purchase_orders", ORDER_INDEXES["purchase_orders"])
+            item_bulk = bulk_load(
+                session, "purchase_order_items", ORDER_INDEXES["purchase_order_items"]
+            )
+        else:
+            bulk = item_bulk = nullcontext()
+
+        with bulk, item_bulk:
+            # Replace existing orders
+            truncate_tables(session, "purchase_order_items", "purchase_orders")
+            session.bulk_insert_mappings(PurchaseOrder, po_rows)
+            session.bulk_insert_mappings(PurchaseOrderItem, item_rows)
+            session.commit()
         print("Commit successful")
         print(f"✅ Successfully created {orders_created} purchase orders!")
 
@@ -193,4 +217,11 @@ def generate_orders():
 
 
 if __name__ == "__main__":
-    generate_orders()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--fast-bulk",
+        action="store_true",
+        help="Suspend order indexes and FK checks during the reload",
+    )
+    args = parser.parse_args()
+    generate_orders(fast_bulk=args.fast_bulk)
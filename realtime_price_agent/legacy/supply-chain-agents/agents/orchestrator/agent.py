@@ -4,58 +4,38 @@ Routes queries to appropriate specialized agents
 """
 
 import asyncio
+import contextlib
+import functools
+import io
+import json
 import os
-from typing import Dict, List
+import re
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Final, List, NamedTuple, Optional, Tuple
+import httpx
+import numpy as np
 from agent_framework import ChatAgent, MCPStreamableHTTPTool
 from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity.aio import DefaultAzureCredential
+from azure.identity.aio import (
+    AzureCliCredential,
+    ChainedTokenCredential,
+    EnvironmentCredential,
+    ManagedIdentityCredential,
+    get_bearer_token_provider,
+)
+from openai import AsyncAzureOpenAI
+from prompt_toolkit import PromptSession
+from prompt_toolkit.completion import WordCompleter, merge_completers
+from prompt_toolkit.history import FileHistory
 
-class OrchestratorAgent:
-    """
-    Main orchestrator that routes queries to specialized agents
-    Acts as the entry point for the supply chain system
-    """
-    
-    def __init__(self):
-        # Agent URLs (in production, these would be service URLs)
-        self.price_agent_url = os.getenv("PRICE_AGENT_URL", "http://price-monitoring:8080")
-        self.demand_agent_url = os.getenv("DEMAND_AGENT_URL", "http://demand-forecasting:8081")
-        self.ordering_agent_url = os.getenv("ORDERING_AGENT_URL", "http://automated-ordering:8082")
-        
-        # Azure OpenAI config
-        self.azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
-    
-    async def run(self):
-        """Initialize and run the orchestrator"""
-        
-        print("Initializing Orchestrator Agent...")
-        
-        async with (
-            DefaultAzureCredential() as credential,
-            AzureOpenAIChatClient(
-                endpoint=self.azure_endpoint,
-                credential=credential,
-                deployment_name=self.deployment_name
-            ) as chat_client
-        ):
-            agent = ChatAgent(
-                chat_client=chat_client,
-                name="OrchestratorAgent",
-                instructions=self._get_instructions(),
-            )
-            
-            print("Orchestrator initialized!")
-            print("\nAvailable Agents:")
-            print("   1. Price Monitoring - Price changes, supplier optimization")
-            print("   2. Demand Forecasting - Sales predictions, trend analysis")
-            print("   3. Automated Ordering - Purchase order generation")
-            
-            await self._interactive_mode(agent)
-    
-    def _get_instructions(self) -> str:
-        """Orchestrator system instructions"""
-        return """You are the Orchestrator Agent for a supply chain management system.
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# Kept static (no interpolated timestamps/ids) so the prompt prefix is
+# byte-identical across sessions and hits Azure OpenAI prompt caching
+ORCHESTRATOR_INSTRUCTIONS: Final[str] = """You are the Orchestrator Agent for a supply chain management system.
 Your role is to analyze user queries and route them to the appropriate specialized agent(s).
 
 AVAILABLE SPECIALIZED AGENTS:
@@ -90,6 +70,466 @@ ROUTING LOGIC:
 Always explain which agent(s) you're routing to and why.
 Format responses clearly and provide actionable insights."""
 
+SPECIALIST_INSTRUCTIONS: Final[Dict[str, str]] = {
+    "price": """You are the Price Monitoring Agent for a supply chain management system.
+Focus only on prices, supplier options, costs and margin impact in the user's query.
+Be concise and give actionable recommendations.""",
+    "demand": """You are the Demand Forecasting Agent for a supply chain management system.
+Focus only on demand predictions, sales trends and stocking levels in the user's query.
+Be concise and give actionable recommendations.""",
+    "ordering": """You are the Automated Ordering Agent for a supply chain management system.
+Focus only on purchase orders, quantities and supplier ordering in the user's query.
+Be concise and give actionable recommendations.""",
+}
+
+# Interactive output goes straight to the binary stdout buffer with one
+# flush per user-visible event, bypassing print()'s per-call overhead
+_out = sys.stdout.buffer
+_write = _out.write
+
+
+def _emit(text: str = "", end: str = "\n"):
+    """Write one user-visible event and flush once"""
+    _write((text + end).encode("utf-8"))
+    _out.flush()
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Pooled keep-alive HTTP/2 client shared by every Azure OpenAI call, so
+    interactive turns reuse warm TLS sessions instead of reconnecting.
+    """
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=limits,
+        socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)],
+    )
+    return httpx.AsyncClient(transport=transport, limits=limits, http2=True, timeout=30.0)
+
+
+def create_credential() -> ChainedTokenCredential:
+    """
+    Narrowed credential chain instead of DefaultAzureCredential, which
+    probes every auth source on the first token request. Set
+    AZURE_CLIENT_ID in containers so managed identity skips IMDS discovery.
+    """
+    return ChainedTokenCredential(
+        EnvironmentCredential(),
+        ManagedIdentityCredential(client_id=os.getenv("AZURE_CLIENT_ID")),
+        AzureCliCredential(),
+    )
+
+
+@dataclass
+class CachedResult:
+    """Orchestrator response stored in the routing cache"""
+    text: str
+    created_at: float
+
+
+class RoutingCache:
+    """
+    Two-tier cache for orchestrator responses.
+    Tier 1: exact match on a normalized query string.
+    Tier 2: cosine similarity over query embeddings kept in one contiguous
+    matrix, so a lookup is a single matrix-vector product.
+    """
+
+    ABBREVIATIONS = {
+        "qty": "quantity",
+        "lbs": "pounds",
+        "lb": "pound",
+        "po": "purchase order",
+        "pos": "purchase orders",
+        "wk": "week",
+        "asap": "as soon as possible",
+    }
+    _WORD = re.compile(r"[a-z0-9$%.-]+")
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None,
+        threshold: float = 0.9,
+    ):
+        self._embed = embed
+        self.threshold = threshold
+        self._exact: Dict[str, CachedResult] = {}
+        self._matrix: Optional[np.ndarray] = None  # (n, dim), rows L2-normalized
+        self._results: List[CachedResult] = []
+        self._last_lookup: Optional[tuple] = None  # (key, embedding) from the last miss
+        self._pending: Dict[str, CachedResult] = {}  # stored but not yet embedded
+
+    @classmethod
+    def normalize(cls, query: str) -> str:
+        """Lowercase, collapse whitespace, and expand common abbreviations"""
+        words = cls._WORD.findall(query.lower())
+        return " ".join(cls.ABBREVIATIONS.get(w, w) for w in words)
+
+    async def get(self, query: str) -> Optional[str]:
+        """Return a cached response for the query, or None on a miss"""
+        key = self.normalize(query)
+        hit = self._exact.get(key)
+        if hit is not None:
+            return hit.text
+
+        if self._embed is None or self._matrix is None:
+            return None
+
+        vector = await self._embedding(key)
+        if vector is None:
+            return None
+        self._last_lookup = (key, vector)
+
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self._results[best].text
+        return None
+
+    def put(self, query: str, text: str):
+        """
+        Store a response under the query. The exact tier is updated now;
+        the semantic tier is filled by prefetch_embeddings().
+        """
+        key = self.normalize(query)
+        result = CachedResult(text=text, created_at=time.time())
+        self._exact[key] = result
+
+        if self._embed is None:
+            return
+
+        # Reuse the embedding computed by the preceding miss when possible
+        if self._last_lookup is not None and self._last_lookup[0] == key:
+            self._append(self._last_lookup[1], result)
+        else:
+            self._pending[key] = result
+        self._last_lookup = None
+
+    async def prefetch_embeddings(self):
+        """Embed all pending entries in one request (run during think time)"""
+        if self._embed is None or not self._pending:
+            return
+
+        keys = list(self._pending)
+        try:
+            vectors = np.asarray(await self._embed(keys), dtype=np.float32)
+        except Exception:
+            # Semantic tier is best-effort; entries stay exact-match only
+            return
+
+        for key, vector in zip(keys, vectors):
+            result = self._pending.pop(key, None)
+            norm = np.linalg.norm(vector)
+            if result is not None and norm:
+                self._append(vector / norm, result)
+
+    def _append(self, vector: np.ndarray, result: CachedResult):
+        row = vector[np.newaxis, :]
+        self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+        self._results.append(result)
+
+    async def _embedding(self, key: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray((await self._embed([key]))[0], dtype=np.float32)
+        except Exception:
+            # Semantic tier is best-effort; fall back to exact matches only
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+
+class FastRouter:
+    """
+    Keyword router mirroring the ROUTING LOGIC table in the instructions.
+    Single-intent queries go straight to that specialist, multi-intent
+    queries fan out to each; zero-intent queries fall through to the LLM.
+    """
+
+    ROUTES = {
+        "price": (
+            "Price Monitoring Agent",
+            re.compile(r"\b(prices?|pricing|suppliers?|margins?|costs?|cheap(est|er)?|expensive)\b", re.IGNORECASE),
+        ),
+        "demand": (
+            "Demand Forecasting Agent",
+            re.compile(r"\b(forecast\w*|predict\w*|demand|trends?|seasonal\w*)\b", re.IGNORECASE),
+        ),
+        "ordering": (
+            "Automated Ordering Agent",
+            re.compile(r"\b(orders?|ordering|purchase|buy|restock|po)\b", re.IGNORECASE),
+        ),
+    }
+
+    def classify(self, query: str) -> Dict[str, List[str]]:
+        """Return matched route -> keywords that triggered it"""
+        matches = {}
+        for route, (_, pattern) in self.ROUTES.items():
+            found = sorted({m.group(0).lower() for m in pattern.finditer(query)})
+            if found:
+                matches[route] = found
+        return matches
+
+    def respond(self, route: str, keywords: List[str]) -> str:
+        """Templated routing decision, printed ahead of the specialist's answer"""
+        name = self.ROUTES[route][0]
+        return (
+            f"Routing to the {name}.\n"
+            f"Reason: the query mentions {', '.join(repr(k) for k in keywords)}, "
+            f"which falls under the {name}'s responsibilities."
+        )
+
+
+class OrchestratorConfig(NamedTuple):
+    """Parsed orchestrator environment configuration"""
+    price_agent_url: str
+    demand_agent_url: str
+    ordering_agent_url: str
+    azure_endpoint: str
+    deployment_name: str
+    api_version: str
+    embedding_deployment: str
+    cache_threshold: float
+
+
+def _env(name: str, default: Optional[str] = None) -> str:
+    """Read an environment variable, failing fast if a required one is missing"""
+    value = os.getenv(name, default)
+    if not value:
+        raise EnvironmentError(f"{name} environment variable is required")
+    return value
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> OrchestratorConfig:
+    """Validate and parse the environment once per process"""
+    threshold = _env("ROUTING_CACHE_THRESHOLD", "0.9")
+    try:
+        cache_threshold = float(threshold)
+    except ValueError:
+        raise EnvironmentError(f"ROUTING_CACHE_THRESHOLD must be a number, got '{threshold}'")
+
+    return OrchestratorConfig(
+        # Agent URLs (in production, these would be service URLs)
+        price_agent_url=_env("PRICE_AGENT_URL", "http://price-monitoring:8080"),
+        demand_agent_url=_env("DEMAND_AGENT_URL", "http://demand-forecasting:8081"),
+        ordering_agent_url=_env("ORDERING_AGENT_URL", "http://automated-ordering:8082"),
+        # Azure OpenAI config
+        azure_endpoint=_env("AZURE_OPENAI_ENDPOINT"),
+        deployment_name=_env("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini"),
+        api_version=_env("AZURE_OPENAI_API_VERSION", "2024-10-21"),
+        embedding_deployment=_env("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-small"),
+        cache_threshold=cache_threshold,
+    )
+
+
+class OrchestratorAgent:
+    """
+    Main orchestrator that routes queries to specialized agents
+    Acts as the entry point for the supply chain system
+    """
+    
+    def __init__(self):
+        # Raises EnvironmentError before any credential or client is created
+        config = _load_config()
+
+        # Agent URLs (in production, these would be service URLs)
+        self.price_agent_url = config.price_agent_url
+        self.demand_agent_url = config.demand_agent_url
+        self.ordering_agent_url = config.ordering_agent_url
+        
+        # Azure OpenAI config
+        self.azure_endpoint = config.azure_endpoint
+        self.deployment_name = config.deployment_name
+        self.api_version = config.api_version
+        self.embedding_deployment = config.embedding_deployment
+
+        # Response cache for repeated / near-duplicate queries
+        self.cache = RoutingCache(
+            embed=self._embed,
+            threshold=config.cache_threshold,
+        )
+        self.router = FastRouter()
+        self.specialists: Dict[str, ChatAgent] = {}
+        self._embeddings_client: Optional[AsyncAzureOpenAI] = None
+        self._background_tasks = set()
+
+        # Credential, clients and agent are created once and reused across run() calls
+        self._agent: Optional[ChatAgent] = None
+        self._resources: Optional[contextlib.AsyncExitStack] = None
+        self._init_lock = asyncio.Lock()
+    
+    async def run(self):
+        """Initialize and run the orchestrator"""
+        
+        print("Initializing Orchestrator Agent...")
+        
+        agent = await self._ensure_agent()
+            
+        print("Orchestrator initialized!")
+        print("\nAvailable Agents:")
+        print("   1. Price Monitoring - Price changes, supplier optimization")
+        print("   2. Demand Forecasting - Sales predictions, trend analysis")
+        print("   3. Automated Ordering - Purchase order generation")
+        
+        await self._interactive_mode(agent)
+
+    async def _ensure_agent(self) -> ChatAgent:
+        """Create the credential, pooled clients and agents on first use"""
+        if self._agent is not None:
+            return self._agent
+
+        async with self._init_lock:
+            if self._agent is not None:
+                return self._agent
+
+            async with contextlib.AsyncExitStack() as stack:
+                shared_client = await stack.enter_async_context(create_http_client())
+                credential = await stack.enter_async_context(create_credential())
+                openai_client = await stack.enter_async_context(AsyncAzureOpenAI(
+                    azure_endpoint=self.azure_endpoint,
+                    azure_ad_token_provider=get_bearer_token_provider(credential, COGNITIVE_SERVICES_SCOPE),
+                    api_version=self.api_version,
+                    http_client=shared_client,
+                ))
+                chat_client = await stack.enter_async_context(AzureOpenAIChatClient(
+                    endpoint=self.azure_endpoint,
+                    credential=credential,
+                    deployment_name=self.deployment_name,
+                    async_client=openai_client,
+                ))
+
+                # Fetch the first token now so the first turn skips the auth round-trip
+                await credential.get_token(COGNITIVE_SERVICES_SCOPE)
+
+                self._embeddings_client = openai_client
+                # Specialists share the pooled chat client for multi-intent fan-out
+                self.specialists = {
+                    route: ChatAgent(
+                        chat_client=chat_client,
+                        name=FastRouter.ROUTES[route][0].replace(" ", ""),
+                        instructions=instructions,
+                    )
+                    for route, instructions in SPECIALIST_INSTRUCTIONS.items()
+                }
+                self._agent = ChatAgent(
+                    chat_client=chat_client,
+                    name="OrchestratorAgent",
+                    instructions=self._get_instructions(),
+                )
+                # Keep everything open past this block; aclose() releases it
+                self._resources = stack.pop_all()
+
+        return self._agent
+
+    async def aclose(self):
+        """Close the clients and credential opened by _ensure_agent()"""
+        async with self._init_lock:
+            if self._resources is not None:
+                await self._resources.aclose()
+            self._resources = None
+            self._agent = None
+            self._embeddings_client = None
+            self.specialists = {}
+    
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the Azure OpenAI embedding deployment"""
+        response = await self._embeddings_client.embeddings.create(
+            model=self.embedding_deployment,
+            input=texts,
+        )
+        return [item.embedding for item in response.data]
+
+    async def run_batch(self, queries: List[str]) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Route a bulk set of queries through the Azure OpenAI Batch API.
+        Intended for offline workloads (e.g. nightly re-scoring); yields
+        (query, response) pairs as the output file is read.
+        """
+        lines = [
+            json.dumps({
+                "custom_id": f"q-{i}",
+                "method": "POST",
+                "url": "/chat/completions",
+                "body": {
+                    "model": self.deployment_name,
+                    "messages": [
+                        {"role": "system", "content": ORCHESTRATOR_INSTRUCTIONS},
+                        {"role": "user", "content": query},
+                    ],
+                },
+            })
+            for i, query in enumerate(queries)
+        ]
+        payload = io.BytesIO("\n".join(lines).encode("utf-8"))
+
+        async with (
+            create_http_client() as http_client,
+            create_credential() as credential,
+            AsyncAzureOpenAI(
+                azure_endpoint=self.azure_endpoint,
+                azure_ad_token_provider=get_bearer_token_provider(credential, COGNITIVE_SERVICES_SCOPE),
+                api_version=self.api_version,
+                http_client=http_client,
+            ) as client
+        ):
+            batch_file = await client.files.create(
+                file=("orchestrator_batch.jsonl", payload),
+                purpose="batch",
+            )
+            batch = await client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/chat/completions",
+                completion_window="24h",
+            )
+            print(f"Submitted batch {batch.id} ({len(queries)} queries)")
+
+            # Poll with exponential backoff, capped at 5 minutes
+            delay = 5.0
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 300.0)
+                batch = await client.batches.retrieve(batch.id)
+
+            if batch.status != "completed" or not batch.output_file_id:
+                raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+
+            content = await client.files.content(batch.output_file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                index = int(record["custom_id"].split("-", 1)[1])
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    text = response["body"]["choices"][0]["message"]["content"]
+                else:
+                    text = f"Error: {record.get('error') or response.get('body')}"
+                yield queries[index], text
+
+    async def _fan_out(self, routes: List[str], user_input: str) -> str:
+        """Run the matched specialists concurrently and combine their answers"""
+        results = await asyncio.gather(
+            *(self.specialists[route].run(user_input) for route in routes),
+            return_exceptions=True,
+        )
+        sections = [f"Routing to {len(routes)} agents in parallel.\n"]
+        for route, result in zip(routes, results):
+            name = FastRouter.ROUTES[route][0]
+            body = f"Error: {result}" if isinstance(result, Exception) else result.text
+            sections.append(f"[{name}]\n{body}\n")
+        return "\n".join(sections)
+
+    def _in_background(self, coro):
+        """Run a coroutine without blocking the prompt loop"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _get_instructions(self) -> str:
+        """Orchestrator system instructions"""
+        return ORCHESTRATOR_INSTRUCTIONS
+
     async def _interactive_mode(self, agent: ChatAgent):
         """Run orchestrator in interactive mode"""
         
@@ -107,34 +547,92 @@ Format responses clearly and provide actionable insights."""
         for i, example in enumerate(examples, 1):
             print(f"   {i}. {example}")
         print()
-        
+
+        sys.stdout.flush()
+
+        # Native asyncio prompt with history and completion of common queries
+        session = PromptSession(
+            history=FileHistory(".orch_history"),
+            completer=merge_completers([
+                WordCompleter(examples, sentence=True),
+                WordCompleter(["butter", "flour", "milk", "SKU-", "supplier", "forecast", "order"], ignore_case=True),
+            ]),
+        )
+
         while True:
             try:
-                user_input = input("🔵 You: ").strip()
+                # Use the user's think time to embed last turn's cache entry;
+                # this also keeps the pooled connection warm
+                self._in_background(self.cache.prefetch_embeddings())
+                try:
+                    user_input = (await session.prompt_async("🔵 You: ")).strip()
+                except EOFError:
+                    _emit("\n Goodbye!")
+                    break
                 
                 if not user_input:
                     continue
                     
                 if user_input.lower() in ['exit', 'quit', 'q']:
-                    print("\n Goodbye!")
+                    _emit("\n Goodbye!")
                     break
                 
-                print("\n🤖 Orchestrator: ", end="", flush=True)
-                
-                result = await agent.run(user_input)
-                
-                print(result.text)
-                print()
+                _emit("\n🤖 Orchestrator: ", end="")
+
+                cached = await self.cache.get(user_input)
+                if cached is not None:
+                    _emit(cached + "\n")
+                    continue
+
+                routes = self.router.classify(user_input)
+                if len(routes) > 1 and self.specialists:
+                    text = await self._fan_out(list(routes), user_input)
+                    _emit(text + "\n")
+                else:
+                    # Single-intent queries skip the routing LLM and go
+                    # straight to the matched specialist
+                    responder, parts = agent, []
+                    if len(routes) == 1 and self.specialists:
+                        (route, keywords), = routes.items()
+                        responder = self.specialists[route]
+                        parts.append(self.router.respond(route, keywords) + "\n\n")
+                        _emit(parts[0], end="")
+
+                    # Stream tokens as they arrive; keep the parts for the cache
+                    async for update in responder.run_stream(user_input):
+                        if update.text:
+                            parts.append(update.text)
+                            _write(update.text.encode("utf-8"))
+                            _out.flush()
+                    text = "".join(parts)
+                    _emit("\n")
+
+                self.cache.put(user_input, text)
                 
             except KeyboardInterrupt:
-                print("\n\n Goodbye!")
+                _emit("\n\n Goodbye!")
                 break
             except Exception as e:
-                print(f"\n Error: {e}\n")
+                _emit(f"\n Error: {e}\n")
+
+        for task in list(self._background_tasks):
+            task.cancel()
 
 async def main():
     orchestrator = OrchestratorAgent()
-    await orchestrator.run()
+
+    # python agent.py --batch queries.txt  (one query per line)
+    if len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        with open(sys.argv[2], encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+        async for query, response in orchestrator.run_batch(queries):
+            print(f"🔵 {query}\n🤖 {response}\n")
+        return
+
+    try:
+        await orchestrator.run()
+    finally:
+        await orchestrator.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,30 +1,80 @@
+import asyncio
+import base64
+import fcntl
+import hashlib
+import heapq
+import itertools
 import json
 import logging
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from operator import attrgetter
 from datetime import datetime
 
-from fastapi import FastAPI, Query, HTTPException, Depends
-from fastapi.responses import StreamingResponse, HTMLResponse, FileResponse
+import httpx
+import orjson
+from fastapi import FastAPI, Query, HTTPException, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, HTMLResponse, FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from fastapi.middleware.gzip import GZipMiddleware
+from contextlib import asynccontextmanager, contextmanager
 from typing import List, Optional
+from sqlalchemy import String, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from pathlib import Path
 
 # Database imports (now at root level)
-from database.config import get_db, test_connection
+from database.config import (
+    get_db, get_async_db, get_async_session_factory, get_session_factory, test_connection,
+)
 from database.models import Product, Supplier, PurchaseOrder, PurchaseOrderItem
 from services.inventory_service import InventoryService
 from services.supplier_service import SupplierService
 from services.order_service import OrderService
+from services.workflow_service import WorkflowService, WorkflowResult
+from services.cache import response_cache, cached
+from services.audit_log import audit_log
+from services.approval_store import order_approvals, negotiation_approvals
+from schemas.inventory import (
+    ProductOut,
+    ProductDetailOut,
+    LowStockProductOut,
+    SupplierOut,
+    SupplierDetailOut,
+    SupplierProductOut,
+    SupplierWithProductsOut,
+    OrderOut,
+)
 
 # Agent imports
+from agents.demand_forecasting import DemandForecasterService
 from agents.orchestrator.magentic_workflow import magentic_orchestrator
 from agents.orchestrator.tools.tool_registry import tool_registry
 
 logger = logging.getLogger(__name__)
 
+# Ids for workflows, sessions and mandates: a random tag drawn once per process
+# (so workers and restarts never collide) plus a counter
+_ID_TAG = os.urandom(4).hex()
+_ID_COUNTER = itertools.count(1)
+
+
+def fast_id(prefix: str) -> str:
+    """Short unique id like NEG-1a2b3c4d-1f, without a urandom read per call."""
+    return f"{prefix}-{_ID_TAG}-{next(_ID_COUNTER):x}"
+
+
+# Forecast model, loaded once at import (same singleton the workflow service uses)
+_FORECASTER = DemandForecasterService.get_instance()
+
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
@@ -45,6 +95,10 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Database connection error: {e}")
         print(f"⚠️ Database connection error: {e}")
 
+    await response_cache.connect()
+    compact_history()
+    history_task = asyncio.create_task(history_flusher())
+
     # Initialize agent workflow
     print("Initializing Supply Chain Agents...")
     try:
@@ -57,14 +111,23 @@ async def lifespan(app: FastAPI):
     yield
 
     # Cleanup
+    history_task.cancel()
     try:
+        await history_task
+    except asyncio.CancelledError:
+        pass
+    drain_history()
+
+    try:
+        await response_cache.close()
+        await finance_mcp_client.aclose()
         await tool_registry.close_all()
         print("✅ Cleanup complete")
     except Exception as e:
         logger.error(f"Cleanup error: {e}")
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware for dashboard
 app.add_middleware(
@@ -73,8 +136,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Compress JSON bodies over 1 KB (SSE responses are left uncompressed)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Static files for dashboard
 STATIC_DIR = Path(__file__).parent / "static"
 if STATIC_DIR.exists():
@@ -92,106 +159,159 @@ async def dashboard():
     return HTMLResponse("<h1>Dashboard not found</h1><p>Run from project root.</p>")
 
 
+# ========== PAGINATION ==========
+
+
+def encode_cursor(*key) -> str:
+    """Opaque keyset cursor for the last row of a page"""
+    raw = json.dumps([k.isoformat() if isinstance(k, datetime) else k for k in key])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int = 1) -> list:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        key = None
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def paged_response(rows, limit: int, *key_columns: str) -> ORJSONResponse:
+    """List response with the next page's cursor in the X-Next-Cursor header"""
+    response = ORJSONResponse([dict(r) for r in rows])
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(*(last[c] for c in key_columns))
+    return response
+
+
+# ========== HTTP CACHING ==========
+
+# Clients may keep detail responses but must revalidate them (ETag -> 304)
+DETAIL_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*version) -> str:
+    """Weak ETag from a resource's version fields (ids, timestamps, counters)"""
+    digest = hashlib.blake2b(repr(version).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Set validator headers on the response; return a bodiless 304 if the
+    client's If-None-Match already has this version.
+    """
+    headers = {"ETag": etag, "Cache-Control": DETAIL_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (tag.strip() for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 # ========== INVENTORY ENDPOINTS ==========
 
 
-@app.get("/products")
-def list_products(
-    db: Session = Depends(get_db),
+@app.get("/products", response_model=List[ProductOut])
+async def list_products(
+    db: AsyncSession = Depends(get_async_db),
     query: str = Query(None, description="Search in title"),
     brand: str = Query(None, description="Filter by brand"),
     min_qty: int = Query(None, description="Minimum available quantity"),
     skip: int = Query(0, description="Number of records to skip"),
     limit: int = Query(50, description="Maximum number of records to return"),
-) -> List[dict]:
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+) -> ORJSONResponse:
     """Get products with optional filtering"""
-    service = InventoryService(db)
-    products = service.get_products(
-        brand=brand, query=query, min_qty=min_qty, skip=skip, limit=limit
+    stmt = InventoryService.product_rows_query(
+        brand=brand, query=query, min_qty=min_qty, skip=skip, limit=limit,
+        after=decode_cursor(after)[0] if after else None,
     )
+    rows = (await db.execute(stmt)).mappings().all()
 
-    return [
-        {
-            "asin": p.asin,
-            "title": p.title,
-            "brand": p.brand,
-            "description": p.description,
-            "unit_cost": float(p.unit_cost) if p.unit_cost else None,
-            "market_price": float(p.market_price) if p.market_price else None,
-            "quantity_on_hand": p.quantity_on_hand,
-            "quantity_reserved": p.quantity_reserved,
-            "quantity_available": p.quantity_available,
-            "reorder_point": p.reorder_point,
-            "supplier_id": p.supplier_id,
-        }
-        for p in products
-    ]
+    return paged_response(rows, limit, "asin")
 
 
-@app.get("/products/{asin}")
-def get_product_details(asin: str, db: Session = Depends(get_db)):
-    """Get single product by ASIN"""
-    service = InventoryService(db)
-    product = service.get_product_by_asin(asin)
+async def _products_ndjson(stmt):
+    """Stream rows as NDJSON in yield_per-sized chunks over a server-side cursor"""
+    # Own session: the generator outlives the request's dependencies
+    async with get_async_session_factory()() as db:
+        result = await db.stream(stmt.execution_options(yield_per=1000))
+        async for rows in result.mappings().partitions():
+            yield b"".join(orjson.dumps(dict(row)) + b"\n" for row in rows)
+
+
+# Declared before /products/{asin} so "export" is not taken as an ASIN
+@app.get("/products/export")
+async def export_products(
+    query: str = Query(None, description="Search in title"),
+    brand: str = Query(None, description="Filter by brand"),
+    min_qty: int = Query(None, description="Minimum available quantity"),
+) -> StreamingResponse:
+    """Export all matching products as newline-delimited JSON (constant memory)"""
+    stmt = InventoryService.product_export_query(brand=brand, query=query, min_qty=min_qty)
+
+    return StreamingResponse(
+        _products_ndjson(stmt),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="products.ndjson"'},
+    )
+
+
+@app.get("/products/{asin}", response_model=ProductDetailOut)
+async def get_product_details(
+    asin: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get single product by ASIN (ETag-validated)"""
+    # Probe the version first; the full row is only loaded on a cache miss
+    version = (await db.execute(InventoryService.product_version_query(asin))).first()
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    cached_response = not_modified(request, response, make_etag("product", asin, *version))
+    if cached_response is not None:
+        return cached_response
+
+    product = (await db.scalars(InventoryService.product_detail_query(asin))).first()
 
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return {
-        "asin": product.asin,
-        "title": product.title,
-        "brand": product.brand,
-        "description": product.description,
-        "unit_cost": float(product.unit_cost) if product.unit_cost else None,
-        "last_purchase_price": float(product.last_purchase_price)
-        if product.last_purchase_price
-        else None,
-        "market_price": float(product.market_price) if product.market_price else None,
-        "quantity_on_hand": product.quantity_on_hand,
-        "quantity_reserved": product.quantity_reserved,
-        "quantity_available": product.quantity_available,
-        "reorder_point": product.reorder_point,
-        "reorder_quantity": product.reorder_quantity,
-        "lead_time_days": product.lead_time_days,
-        "supplier_id": product.supplier_id,
-        "supplier_name": product.supplier.supplier_name if product.supplier else None,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at,
-        "is_active": product.is_active,
-    }
+    return product
 
 
-@app.get("/inventory/low-stock")
-def get_low_stock_products(
-    db: Session = Depends(get_db),
+@app.get("/inventory/low-stock", response_model=List[LowStockProductOut])
+async def get_low_stock_products(
+    db: AsyncSession = Depends(get_async_db),
     threshold: int = Query(None, description="Custom threshold (optional)"),
 ):
     """Get products that need reordering"""
-    service = InventoryService(db)
-    products = service.get_low_stock_products(threshold)
+    products = await db.scalars(InventoryService.low_stock_query(threshold))
 
-    return [
-        {
-            "asin": p.asin,
-            "title": p.title,
-            "brand": p.brand,
-            "quantity_available": p.quantity_available,
-            "reorder_point": p.reorder_point,
-            "supplier_id": p.supplier_id,
-        }
-        for p in products
-    ]
+    return products.all()
 
 
 @app.get("/inventory/summary")
-def get_inventory_summary(db: Session = Depends(get_db)):
-    """Get inventory summary statistics"""
-    service = InventoryService(db)
-    return service.get_stock_summary()
+@cached(ttl=30, key=lambda **_: "inventory:summary")
+async def get_inventory_summary(db: AsyncSession = Depends(get_async_db)):
+    """Get inventory summary statistics (cached for 30s)"""
+    row = (await db.execute(InventoryService.stock_summary_query())).one()
+    return InventoryService.format_stock_summary(row)
 
 
 @app.post("/inventory/adjust-stock")
-def adjust_stock(
+async def adjust_stock(
     asin: str,
     quantity_change: int,
     reason: str = "Manual adjustment",
@@ -199,11 +319,15 @@ def adjust_stock(
 ):
     """Adjust stock levels for a product"""
     service = InventoryService(db)
-    product = service.adjust_stock(asin, quantity_change, reason)
+    product = await run_in_threadpool(service.adjust_stock, asin, quantity_change, reason)
 
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    # Stock levels feed both the summary and the optimize stream's product rows
+    await response_cache.delete("inventory:summary")
+    await response_cache.delete_prefix("workflow:stock_rows:")
+
     return {
         "asin": product.asin,
         "title": product.title,
@@ -215,127 +339,111 @@ def adjust_stock(
 # ========== SUPPLIER ENDPOINTS ==========
 
 
-@app.get("/suppliers")
-def list_suppliers(
-    db: Session = Depends(get_db), skip: int = Query(0), limit: int = Query(50)
-) -> List[dict]:
+@app.get("/suppliers", response_model=List[SupplierOut])
+async def list_suppliers(
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = Query(0),
+    limit: int = Query(50),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+) -> ORJSONResponse:
     """Get all suppliers"""
-    service = SupplierService(db)
-    suppliers = service.get_all_suppliers()
+    stmt = SupplierService.supplier_rows_query(
+        skip=skip, limit=limit, after=decode_cursor(after)[0] if after else None
+    )
+    rows = (await db.execute(stmt)).mappings().all()
 
-    # Apply pagination manually since service doesn't support it
-    suppliers = suppliers[skip : skip + limit]
+    return paged_response(rows, limit, "supplier_id")
 
-    return [
-        {
-            "supplier_id": s.supplier_id,
-            "supplier_name": s.supplier_name,
-            "contact_person": s.contact_person,
-            "email": s.email,
-            "phone": s.phone,
-            "city": s.city,
-            "country": s.country,
-            "payment_terms": s.payment_terms,
-            "on_time_delivery_rate": float(s.on_time_delivery_rate)
-            if s.on_time_delivery_rate
-            else None,
-            "quality_rating": float(s.quality_rating) if s.quality_rating else None,
-            "is_active": s.is_active,
-        }
-        for s in suppliers
-    ]
 
+@app.get("/suppliers/{supplier_id}", response_model=SupplierWithProductsOut)
+async def get_supplier_details(
+    supplier_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get supplier details and their active products (ETag-validated)"""
+    version = (await db.execute(SupplierService.supplier_version_query(supplier_id))).first()
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+
+    cached_response = not_modified(request, response, make_etag("supplier", supplier_id, *version))
+    if cached_response is not None:
+        return cached_response
 
-@app.get("/suppliers/{supplier_id}")
-def get_supplier_details(supplier_id: str, db: Session = Depends(get_db)):
-    """Get supplier details and their products"""
-    service = SupplierService(db)
-    supplier = service.get_supplier_by_id(supplier_id)
+    supplier = (await db.scalars(SupplierService.supplier_query(supplier_id))).first()
 
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
 
-    # Get supplier's products
-    products = [
-        {
-            "asin": p.asin,
-            "title": p.title,
-            "brand": p.brand,
-            "quantity_on_hand": p.quantity_on_hand,
-            "quantity_available": p.quantity_available,
-        }
-        for p in supplier.products
-        if p.is_active
-    ]
+    rows = (await db.execute(SupplierService.active_product_rows_query(supplier_id))).all()
 
-    return {
-        "supplier_id": supplier.supplier_id,
-        "supplier_name": supplier.supplier_name,
-        "contact_person": supplier.contact_person,
-        "email": supplier.email,
-        "phone": supplier.phone,
-        "address": supplier.address,
-        "city": supplier.city,
-        "state_province": supplier.state_province,
-        "country": supplier.country,
-        "postal_code": supplier.postal_code,
-        "payment_terms": supplier.payment_terms,
-        "default_lead_time_days": supplier.default_lead_time_days,
-        "on_time_delivery_rate": float(supplier.on_time_delivery_rate)
-        if supplier.on_time_delivery_rate
-        else None,
-        "quality_rating": float(supplier.quality_rating)
-        if supplier.quality_rating
-        else None,
-        "created_at": supplier.created_at,
-        "is_active": supplier.is_active,
-        "products": products,
-        "product_count": len(products),
-    }
+    return SupplierWithProductsOut(
+        **SupplierDetailOut.model_validate(supplier).model_dump(),
+        products=[SupplierProductOut.model_validate(row) for row in rows],
+    )
 
 
 # ========== ORDER ENDPOINTS ==========
 
 
-@app.get("/orders")
-def list_orders(
-    db: Session = Depends(get_db),
+@app.get("/orders", response_model=List[OrderOut])
+async def list_orders(
+    db: AsyncSession = Depends(get_async_db),
     status: str = Query(
         None, description="Filter by status: pending, shipped, received, cancelled"
     ),
     supplier_id: str = Query(None, description="Filter by supplier"),
     skip: int = Query(0),
     limit: int = Query(50),
-) -> List[dict]:
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+) -> ORJSONResponse:
     """Get purchase orders with optional filtering"""
-    service = OrderService(db)
-    orders = service.get_orders(
-        status=status, supplier_id=supplier_id, skip=skip, limit=limit
+    last_key = None
+    if after:
+        order_date, po_number = decode_cursor(after, size=2)
+        try:
+            last_key = (datetime.fromisoformat(order_date), po_number)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    stmt = OrderService.order_rows_query(
+        status=status, supplier_id=supplier_id, skip=skip, limit=limit, after=last_key
     )
+    rows = (await db.execute(stmt)).mappings().all()
+
+    return paged_response(rows, limit, "order_date", "po_number")
 
-    return [
-        {
-            "po_number": o.po_number,
-            "supplier_id": o.supplier_id,
-            "supplier_name": o.supplier.supplier_name,
-            "order_date": o.order_date,
-            "expected_delivery_date": o.expected_delivery_date,
-            "actual_delivery_date": o.actual_delivery_date,
-            "total_cost": float(o.total_cost),
-            "status": o.status,
-            "item_count": o.item_count,
-            "created_by": o.created_by,
-            "created_at": o.created_at,
-        }
-        for o in orders
-    ]
+
+async def _load_order_details(db: AsyncSession, po_number: str) -> Optional[dict]:
+    """Async counterpart of OrderService.get_order_details"""
+    order = (await db.scalars(OrderService.order_query(po_number))).first()
+    if not order:
+        return None
+
+    items = (await db.execute(OrderService.order_items_query(po_number))).all()
+    return OrderService.format_order_details(order, items)
 
 
 @app.get("/orders/{po_number}")
-def get_order_details(po_number: str, db: Session = Depends(get_db)):
-    """Get detailed purchase order information"""
-    service = OrderService(db)
-    order_data = service.get_order_details(po_number)
+async def get_order_details(
+    po_number: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get detailed purchase order information (ETag-validated)"""
+    version = (await db.execute(OrderService.order_version_query(po_number))).first()
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    cached_response = not_modified(request, response, make_etag("order", po_number, *version))
+    if cached_response is not None:
+        return cached_response
+
+    order_data = await _load_order_details(db, po_number)
 
     if not order_data:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -344,10 +452,9 @@ def get_order_details(po_number: str, db: Session = Depends(get_db)):
 
 
 @app.get("/orders/{po_number}/items")
-def get_order_items(po_number: str, db: Session = Depends(get_db)):
+async def get_order_items(po_number: str, db: AsyncSession = Depends(get_async_db)):
     """Get line items for a specific order"""
-    service = OrderService(db)
-    order_data = service.get_order_details(po_number)
+    order_data = await _load_order_details(db, po_number)
 
     if not order_data:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -359,27 +466,35 @@ def get_order_items(po_number: str, db: Session = Depends(get_db)):
 
 
 @app.post("/prices/sync-from-amazon")
-def sync_prices_from_amazon(
+async def sync_prices_from_amazon(
     db: Session = Depends(get_db),
     query: str = Query("laptop", description="Search query for Amazon API"),
     limit: int = Query(100, description="Number of products to fetch"),
 ):
     """Sync prices from live Amazon API to database products"""
-    import requests
-    from datetime import datetime
+    result, updated_asins = await run_in_threadpool(_sync_prices, db, query, limit)
 
-    # Mock implementation
-    import random
-    
+    await response_cache.delete(
+        "inventory:summary", *(f"price:compare:{asin}" for asin in updated_asins)
+    )
+    return result
+
+
+def _sync_prices(db: Session, query: str, limit: int):
+    """Blocking part of sync_prices_from_amazon; returns (response, updated ASINs)"""
     # Mock data generation
     amazon_products = []
     
     # Look up products to simulate "live" data
     db_products = []
     if query:
-        # Simple simulation: just get some products from DB to update
-        from database.models import Product
-        db_products = db.query(Product).filter(Product.title.ilike(f"%{query}%")).limit(limit).all()
+        # Simple simulation: just get some products from DB to update.
+        # Only the needed columns; the title ILIKE uses idx_product_title_trgm
+        db_products = db.execute(
+            select(Product.asin, Product.title, Product.market_price)
+            .where(Product.title.ilike(f"%{query}%"))
+            .limit(limit)
+        ).all()
         
     for p in db_products:
         # Simulate a price slightly different from market price
@@ -393,23 +508,35 @@ def sync_prices_from_amazon(
             "timestamp": datetime.utcnow().isoformat()
         })
 
-    # Update database prices
-    updated_count = 0
-
-    for amazon_product in amazon_products:
-        asin = amazon_product.get("asin")
-        if asin:
-            # Find matching product in database
-            product = db.query(Product).filter(Product.asin == asin).first()
-            if product:
-                # Update market price from live data
-                new_price = amazon_product.get("initial_price")
-                if new_price and isinstance(new_price, (int, float)):
-                    product.market_price = float(new_price)
-                    product.price_last_updated = datetime.utcnow()
-                    updated_count += 1
-
-    if updated_count > 0:
+    # Update database prices: one query to find matching products,
+    # one bulk UPDATE by primary key for all of them
+    asins = [a["asin"] for a in amazon_products if a.get("asin")]
+    # One array parameter (= ANY(:asins)) instead of one bind per ASIN
+    known_asins = set(
+        db.execute(
+            select(Product.asin).where(
+                Product.asin == any_(bindparam("asins", asins, type_=ARRAY(String)))
+            )
+        ).scalars()
+    ) if asins else set()
+
+    now = datetime.utcnow()
+    payload = [
+        {
+            "asin": amazon_product["asin"],
+            "market_price": float(amazon_product["initial_price"]),
+            "price_last_updated": now,
+        }
+        for amazon_product in amazon_products
+        if amazon_product.get("asin") in known_asins
+        and amazon_product.get("initial_price")
+        and isinstance(amazon_product.get("initial_price"), (int, float))
+    ]
+    updated_asins = [row["asin"] for row in payload]
+    updated_count = len(payload)
+
+    if payload:
+        db.execute(update(Product), payload)
         db.commit()
 
     return {
@@ -417,32 +544,31 @@ def sync_prices_from_amazon(
         "api_query": query,
         "api_results_count": len(amazon_products),
         "database_updates": updated_count,
-    }
+    }, updated_asins
 
 
-@app.get("/prices/live-amazon/{asin}")
-def get_live_amazon_price(asin: str):
-    """Get current price from live Amazon API"""
-    import requests
+@lru_cache(maxsize=4096)
+def _mock_amazon_price(asin: str) -> float:
+    """Deterministic (per process) mock Amazon price for an ASIN"""
+    return round(20.0 + (hash(asin) % 1000) / 10.0, 2)
 
+
+@app.get("/prices/live-amazon/{asin}")
+@cached(ttl=60, key=lambda asin, **_: f"amz:{asin}")
+async def get_live_amazon_price(asin: str):
+    """Get current price from live Amazon API (cached for 60s)"""
     try:
         # MOCK IMPLEMENTATION
-        import random
-        from datetime import datetime
-        
         # Determine if ASIN exists (conceptually)
         if len(asin) < 5:
              raise HTTPException(status_code=404, detail="Product not found on Amazon")
-             
-        # Generate mock price
-        mock_price = 20.0 + (hash(asin) % 1000) / 10.0
         
         return {
             "asin": asin,
             "title": f"Mock Product {asin}",
             "seller_name": "Mock Amazon Seller",
             "brand": "Mock Brand",
-            "initial_price": round(mock_price, 2),
+            "initial_price": _mock_amazon_price(asin),
             "timestamp": datetime.utcnow().isoformat(),
             "source": "mock_amazon_api",
         }
@@ -452,20 +578,17 @@ def get_live_amazon_price(asin: str):
 
 
 @app.get("/prices/compare/{asin}")
-def compare_prices(asin: str, db: Session = Depends(get_db)):
-    """Compare database price vs live Amazon price"""
-    import requests
-
+@cached(ttl=60, key=lambda asin, **_: f"price:compare:{asin}")
+async def compare_prices(asin: str, db: AsyncSession = Depends(get_async_db)):
+    """Compare database price vs live Amazon price (cached for 60s)"""
     # Get database price
-    product = db.query(Product).filter(Product.asin == asin).first()
-    db_price = float(product.market_price) if product and product.market_price else None
+    market_price = await db.scalar(select(Product.market_price).where(Product.asin == asin))
+    db_price = float(market_price) if market_price else None
 
     # Get live Amazon price
     try:
         # MOCK IMPLEMENTATION
-        # Generate mock price
-        amazon_price = 20.0 + (hash(asin) % 1000) / 10.0
-        amazon_price = round(amazon_price, 2)
+        amazon_price = _mock_amazon_price(asin)
     except Exception:
         amazon_price = None
 
@@ -489,91 +612,298 @@ def compare_prices(asin: str, db: Session = Depends(get_db)):
 
 # ========== WORKFLOW ENDPOINTS ==========
 
+# Per-row projection for the negotiation stream (one C-level call per product)
+_NEGOTIATION_ITEM_COLS = attrgetter("asin", "title", "reorder_quantity", "unit_cost")
+
+
+def _load_negotiation_items(limit: int) -> List[tuple]:
+    """(asin, title, reorder_quantity, unit_cost) of low-stock products, in a short-lived session."""
+    with get_session_factory()() as db:
+        products = InventoryService(db).get_low_stock_products(limit=limit)
+        return list(map(_NEGOTIATION_ITEM_COLS, products))
+
+
+STOCK_ROWS_TTL = 30  # Seconds a stream's product load is reused (adjust-stock invalidates it)
+
+
+@cached(ttl=STOCK_ROWS_TTL, key=lambda include_all, limit: f"workflow:stock_rows:{int(include_all)}:{limit}")
+async def load_stock_rows(include_all: bool, limit: int) -> List[list]:
+    """[asin, title, unit_cost, quantity_on_hand] rows for the optimize stream."""
+    def load():
+        with get_session_factory()() as db:
+            return [list(row) for row in InventoryService(db).get_stock_rows(include_all, limit)]
+    return await run_in_threadpool(load)
+
+
+def _run_optimization_workflow(**params) -> WorkflowResult:
+    """
+    Run the optimization workflow (blocking DB and forecast work) with its own session.
+    Pass cancel=threading.Event() to stop it from another thread; cancelling
+    the awaiting task alone does not stop the worker thread.
+    """
+    with get_session_factory()() as db:
+        return asyncio.run(WorkflowService(db).run_optimization_workflow(**params))
+
+
+def sse(event: dict) -> bytes:
+    """Encode one Server-Sent Events frame (bytes skip Starlette's re-encode)."""
+    return b"data: " + orjson.dumps(event, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
+
+
+def paced(frames, pacing_ms: int):
+    """Space out SSE frames by pacing_ms; pacing is otherwise left to the client."""
+    if not pacing_ms:
+        return frames
+
+    async def gen():
+        async for frame in frames:
+            yield frame
+            await asyncio.sleep(pacing_ms / 1000)
+    return gen()
+
+
+SSE_PING_SECONDS = 15
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+async def _with_keepalive(frames, interval: float):
+    """Pass frames through, adding an SSE comment whenever the stream idles for `interval`s."""
+    frames = frames.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(frames.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                # Keeps proxies from timing out during long forecast runs
+                yield b": ping\n\n"
+                continue
+            try:
+                frame = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                return
+            pending = None
+            yield frame
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await frames.aclose()
+
+
+def sse_response(frames) -> StreamingResponse:
+    """text/event-stream response over pre-encoded frames, with keep-alive pings."""
+    return StreamingResponse(
+        _with_keepalive(frames, SSE_PING_SECONDS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+# Pre-encoded frames for the fixed-shape telemetry events; fill with bytes %-formatting
+_MCP_LOW_STOCK_CALL = b'data: {"event":"mcp_tool_call","tool":"inventory/get_low_stock","input":{"threshold":10,"limit":%d},"timestamp":%d}\n\n'
+_MCP_LOW_STOCK_RESULT = b'data: {"event":"mcp_tool_result","tool":"inventory/get_low_stock","output":{"count":%d,"products":%b},"timestamp":%d}\n\n'
+_MCP_FORECAST_CALL = b'data: {"event":"mcp_tool_call","tool":"analytics/demand_forecast","input":{"products":%d,"days":%d},"timestamp":%d}\n\n'
+_MCP_FORECAST_RESULT = b'data: {"event":"mcp_tool_result","tool":"analytics/demand_forecast","output":{"forecasts_generated":%d,"avg_confidence":0.85},"timestamp":%d}\n\n'
+_MCP_PRICES_CALL = b'data: {"event":"mcp_tool_call","tool":"supplier/get_prices","input":{"asins":%b},"timestamp":%d}\n\n'
+_MCP_PRICES_RESULT = b'data: {"event":"mcp_tool_result","tool":"supplier/get_prices","output":{"prices_fetched":%d,"avg_price":25.5,"suppliers":["SUPP001","SUPP002"]},"timestamp":%d}\n\n'
+_MCP_FX_CALL = b'data: {"event":"mcp_tool_call","tool":"finance/get_exchange_rate","input":{"base":"USD","targets":["EUR","GBP"]},"timestamp":%d}\n\n'
+_MCP_FX_RESULT = b'data: {"event":"mcp_tool_result","tool":"finance/get_exchange_rate","output":{"rates":{"EUR":0.92,"GBP":0.79},"timestamp":%d},"timestamp":%d}\n\n'
+_WORKFLOW_COMPLETE = b'data: {"event":"complete","result":%b,"elapsed_seconds":%b,"timestamp":%d}\n\n'
+
+_NEGOTIATION_ROUND_FRAMES = {
+    round_type: b'data: {"event":"round","number":%d,"type":' + orjson.dumps(round_type) + b',"timestamp":%d}\n\n'
+    for round_type in ("quote_request", "counter_offer", "final")
+}
+_NEGOTIATION_MCP_CALL_FRAMES = {
+    tool: b'data: {"event":"mcp_call","tool":' + orjson.dumps(tool) + b',"timestamp":%d}\n\n'
+    for tool in ("request_supplier_quote", "submit_counter_offer")
+}
+
 
 # ========== HUMAN IN THE LOOP APPROVALS ==========
 
-# Simple in-memory storage for approvals
-APPROVAL_QUEUE = {}
-HISTORY_FILE = Path("workflow_history.json")
+# Pending approvals live in services.approval_store (shared across workers)
+HISTORY_FILE = Path("workflow_history.jsonl")
+# Appends hold a shared lock on this file, compaction an exclusive one, so
+# no worker writes to an inode that compaction is about to replace
+HISTORY_LOCK_FILE = Path("workflow_history.jsonl.lock")
+HISTORY_LIMIT = 50  # Runs returned by /api/workflows/history and kept on compaction
+
+HISTORY_BATCH_SIZE = 100
+HISTORY_FLUSH_SECONDS = 1.0
+
+# Entries queued by request handlers; written in batches by history_flusher()
+_history_queue: "asyncio.Queue[dict]" = asyncio.Queue()
+
+
+def _history_line(entry: dict) -> bytes:
+    # Add ID if missing
+    if "id" not in entry:
+        entry["id"] = fast_id("RUN")
+    return orjson.dumps(entry, default=str) + b"\n"
+
 
-def save_history(entry: dict):
-    """Save workflow run to history file."""
+@contextmanager
+def _history_lock(mode: int):
+    """flock HISTORY_LOCK_FILE (LOCK_SH / LOCK_EX, optionally | LOCK_NB)."""
+    lock_fd = os.open(HISTORY_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
     try:
-        history = []
-        if HISTORY_FILE.exists():
-            content = HISTORY_FILE.read_text()
-            if content:
-                history = json.loads(content)
-        
-        # Add ID if missing
-        if "id" not in entry:
-            import uuid
-            entry["id"] = str(uuid.uuid4())
-            
-        history.append(entry)
+        fcntl.flock(lock_fd, mode)
+        yield
+    finally:
+        os.close(lock_fd)  # Releases the lock
+
+
+def _append_history(entries: List[dict]):
+    """Append entries to the history file (one JSON object per line)."""
+    try:
+        data = b"".join(map(_history_line, entries))
         
-        # Keep last 50
-        if len(history) > 50:
-            history = history[-50:]
-            
-        HISTORY_FILE.write_text(json.dumps(history, indent=2))
+        # Single O_APPEND write: concurrent workers never interleave lines.
+        # Opened under the lock so it always targets the current inode
+        with _history_lock(fcntl.LOCK_SH):
+            fd = os.open(HISTORY_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
     except Exception as e:
         logger.error(f"Failed to save history: {e}")
 
 
-# ========== AUDIT LOGGING ==========
+def queue_history(entry: dict):
+    """Queue a workflow run for the background history writer."""
+    _history_queue.put_nowait(entry)
 
-AUDIT_LOG = []  # In-memory for demo (use DB in production)
 
-def log_audit(action: str, session_id: str, details: dict):
+async def history_flusher():
+    """Write queued history entries, up to HISTORY_BATCH_SIZE per file write."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _history_queue.get()]
+        deadline = loop.time() + HISTORY_FLUSH_SECONDS
+        try:
+            while len(batch) < HISTORY_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_history_queue.get(), timeout))
+                except TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            _append_history(batch)
+            raise
+        await run_in_threadpool(_append_history, batch)
+
+
+def drain_history():
+    """Write whatever is still queued (run at shutdown)."""
+    batch = []
+    while not _history_queue.empty():
+        batch.append(_history_queue.get_nowait())
+    if batch:
+        _append_history(batch)
+
+
+def history_tail(limit: int = HISTORY_LIMIT) -> List[bytes]:
+    """Last `limit` complete history lines (oldest first), read backwards from EOF."""
+    try:
+        f = HISTORY_FILE.open("rb")
+    except FileNotFoundError:
+        return []
+    
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = b""
+        # limit + 1 newlines guarantee `limit` whole lines
+        while pos > 0 and buf.count(b"\n") <= limit:
+            step = min(8192, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    
+    # Drop whatever follows the last newline (empty, or a write in progress)
+    lines = buf.split(b"\n")[:-1]
+    return [line for line in lines[-limit:] if line.strip()]
+
+
+def compact_history(limit: int = HISTORY_LIMIT):
+    """Trim the history file to its last `limit` runs (run at startup)."""
+    try:
+        if not HISTORY_FILE.exists():
+            return
+        # Exclusive lock blocks appends while the file is swapped; if another
+        # worker is already compacting, its result will do
+        with _history_lock(fcntl.LOCK_EX | fcntl.LOCK_NB):
+            tmp = HISTORY_FILE.with_suffix(f".jsonl.{os.getpid()}.tmp")
+            tmp.write_bytes(b"".join(line + b"\n" for line in history_tail(limit)))
+            tmp.replace(HISTORY_FILE)
+    except BlockingIOError:
+        pass
+    except Exception as e:
+        logger.error(f"Failed to compact history: {e}")
+
+
+# ========== AUDIT LOGGING ==========
+
+async def log_audit(action: str, session_id: str, details: dict):
     """Log an audit entry for negotiation actions."""
-    import uuid
-    AUDIT_LOG.append({
-        "id": f"AUD-{uuid.uuid4().hex[:8]}",
-        "action": action,
-        "session_id": session_id,
-        "timestamp": datetime.utcnow().isoformat(),
-        "details": details
-    })
+    await audit_log.append(action, session_id, details)
+
+
+async def log_audit_bulk(session_id: str, entries: List[dict]):
+    """Write buffered audit entries in one round trip, then clear the buffer."""
+    await audit_log.append_many(session_id, entries)
+    entries.clear()
 
 
 @app.get("/api/audit/negotiation/{session_id}")
 async def get_negotiation_audit(session_id: str):
     """Get audit trail for a negotiation session."""
-    return [a for a in AUDIT_LOG if a["session_id"] == session_id]
+    return await audit_log.get_session(session_id)
 
 
 # ========== NEGOTIATION APPROVAL QUEUE ==========
 
-NEGOTIATION_APPROVAL_QUEUE = {}
+
+def _negotiation_approval_entry(session_id: str, data: dict) -> dict:
+    """Pending-approval card for a negotiation session."""
+    return {
+        "workflow_id": session_id,
+        "type": "negotiation_approval",
+        "message": f"Approve negotiation with {data.get('supplier_name', 'supplier')}",
+        "created_at": data.get("timestamp"),
+        "status": "pending",
+        "context": {
+            "session_id": session_id,
+            "supplier_id": data.get("supplier_id"),
+            "supplier_name": data.get("supplier_name"),
+            "total": data.get("total_value"),
+            "savings_percent": data.get("savings_percent"),
+            "rounds_completed": data.get("rounds_completed"),
+            "items": data.get("items", []),
+            "email_summary": data.get("email_summary", []),
+            "ap2_mandate_preview": data.get("ap2_mandate_preview")
+        }
+    }
 
 
 @app.get("/api/workflows/negotiate/pending-approvals")
 async def get_negotiation_approvals():
     """Get pending negotiation approvals."""
-    approvals_list = []
-    
-    for session_id, data in NEGOTIATION_APPROVAL_QUEUE.items():
-        approvals_list.append({
-            "workflow_id": session_id,
-            "type": "negotiation_approval",
-            "message": f"Approve negotiation with {data.get('supplier_name', 'supplier')}",
-            "created_at": data.get("timestamp"),
-            "status": "pending",
-            "context": {
-                "session_id": session_id,
-                "supplier_id": data.get("supplier_id"),
-                "supplier_name": data.get("supplier_name"),
-                "total": data.get("total_value"),
-                "savings_percent": data.get("savings_percent"),
-                "rounds_completed": data.get("rounds_completed"),
-                "items": data.get("items", []),
-                "email_summary": data.get("email_summary", []),
-                "ap2_mandate_preview": data.get("ap2_mandate_preview")
-            }
-        })
-    
-    approvals_list.sort(key=lambda x: x["created_at"] or "", reverse=True)
+    # Store returns newest first
+    approvals_list = [
+        _negotiation_approval_entry(session_id, data)
+        for session_id, data in await negotiation_approvals.list()
+    ]
     
     return {
         "pending": approvals_list,
@@ -584,21 +914,18 @@ async def get_negotiation_approvals():
 @app.post("/api/workflows/negotiate/approve/{session_id}")
 async def approve_negotiation(session_id: str, db: Session = Depends(get_db)):
     """Approve negotiation → create PO + AP2 mandate → log audit."""
-    import uuid
-    
-    if session_id not in NEGOTIATION_APPROVAL_QUEUE:
+    data = await negotiation_approvals.pop(session_id)
+    if data is None:
         raise HTTPException(status_code=404, detail="Negotiation session not found")
     
-    data = NEGOTIATION_APPROVAL_QUEUE[session_id]
-    
     # Create Purchase Order
-    po_number = f"PO-{uuid.uuid4().hex[:8].upper()}"
+    po_number = fast_id("PO")
     
     # Create AP2 mandate
-    mandate_id = f"ap2-{uuid.uuid4().hex[:12]}"
+    mandate_id = fast_id("ap2")
     
     # Log audit
-    log_audit("negotiation_approved", session_id, {
+    await log_audit("negotiation_approved", session_id, {
         "po_number": po_number,
         "mandate_id": mandate_id,
         "supplier_id": data.get("supplier_id"),
@@ -607,7 +934,7 @@ async def approve_negotiation(session_id: str, db: Session = Depends(get_db)):
     })
     
     # Save to history
-    save_history({
+    queue_history({
         "type": "negotiation_workflow",
         "timestamp": datetime.utcnow().isoformat(),
         "status": "completed",
@@ -622,9 +949,6 @@ async def approve_negotiation(session_id: str, db: Session = Depends(get_db)):
         }
     })
     
-    # Remove from queue
-    del NEGOTIATION_APPROVAL_QUEUE[session_id]
-    
     return {
         "status": "approved",
         "session_id": session_id,
@@ -634,12 +958,12 @@ async def approve_negotiation(session_id: str, db: Session = Depends(get_db)):
     }
 
 @app.get("/api/workflows/pending-approvals")
-def get_pending_approvals():
+async def get_pending_approvals():
     """Get pending human-in-the-loop approval requests (includes negotiation approvals)."""
-    approvals_list = []
+    order_list = []
     
-    # Order approvals from APPROVAL_QUEUE
-    for workflow_id, data in APPROVAL_QUEUE.items():
+    # Order approvals (newest first)
+    for workflow_id, data in await order_approvals.list():
         # Flatten all items from all supplier recommendations for display
         all_items = []
         for rec in data["recommendations"]:
@@ -652,7 +976,7 @@ def get_pending_approvals():
                     "supplier": rec["supplier_name"]
                 })
         
-        approvals_list.append({
+        order_list.append({
             "workflow_id": workflow_id,
             "type": "order_approval",
             "message": f"Approve orders for {len(data['recommendations'])} suppliers",
@@ -665,29 +989,17 @@ def get_pending_approvals():
             }
         })
     
-    # Negotiation approvals from NEGOTIATION_APPROVAL_QUEUE
-    for session_id, data in NEGOTIATION_APPROVAL_QUEUE.items():
-        approvals_list.append({
-            "workflow_id": session_id,
-            "type": "negotiation_approval",
-            "message": f"Approve negotiation with {data.get('supplier_name', 'supplier')}",
-            "created_at": data.get("timestamp"),
-            "status": "pending",
-            "context": {
-                "session_id": session_id,
-                "supplier_id": data.get("supplier_id"),
-                "supplier_name": data.get("supplier_name"),
-                "total": data.get("total_value"),
-                "savings_percent": data.get("savings_percent"),
-                "rounds_completed": data.get("rounds_completed"),
-                "items": data.get("items", []),
-                "email_summary": data.get("email_summary", []),
-                "ap2_mandate_preview": data.get("ap2_mandate_preview")
-            }
-        })
+    # Negotiation approvals (newest first)
+    negotiation_list = [
+        _negotiation_approval_entry(session_id, data)
+        for session_id, data in await negotiation_approvals.list()
+    ]
     
-    # Sort by timestamp desc
-    approvals_list.sort(key=lambda x: x["created_at"] or "", reverse=True)
+    # Both lists are already sorted by timestamp desc; merge them
+    approvals_list = list(heapq.merge(
+        order_list, negotiation_list,
+        key=lambda x: x["created_at"] or "", reverse=True
+    ))
     
     return {
         "pending": approvals_list,
@@ -695,31 +1007,35 @@ def get_pending_approvals():
     }
 
 @app.get("/api/workflows/history")
-def get_workflow_history():
+async def get_workflow_history():
     """Get history of workflow runs."""
+    # Bounded tail read, off the event loop so slow disks don't stall SSE
+    # streams; lines are already JSON, so splice them into an array instead
+    # of parsing and re-encoding each entry
     try:
-        if HISTORY_FILE.exists():
-            content = HISTORY_FILE.read_text()
-            if content:
-                return json.loads(content)
+        lines = await run_in_threadpool(history_tail)
     except Exception:
-        pass
-    return []
+        lines = []
+    return Response(b"[" + b",".join(lines) + b"]", media_type="application/json")
 
 # ========== AP2 PAYMENT INTEGRATION ==========
 
 FINANCE_MCP_URL = "http://localhost:3003/mcp"
 
-def call_ap2_payment(supplier_id: str, amount: float, po_number: str, order_details: dict) -> dict:
+# Keep-alive pool shared by AP2 calls (closed in lifespan cleanup)
+finance_mcp_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    timeout=15,
+)
+
+async def call_ap2_payment(supplier_id: str, amount: float, po_number: str, order_details: dict) -> dict:
     """Execute AP2 payment flow via Finance MCP server.
     
     Creates a payment mandate with user consent (already approved) and executes payment.
     """
-    import requests
-    
     try:
         # Step 1: Create payment mandate
-        mandate_response = requests.post(FINANCE_MCP_URL, json={
+        mandate_response = await finance_mcp_client.post(FINANCE_MCP_URL, json={
             "method": "tools/call",
             "params": {
                 "name": "create_payment_mandate",
@@ -731,7 +1047,7 @@ def call_ap2_payment(supplier_id: str, amount: float, po_number: str, order_deta
                     "user_consent": True  # Already approved by user via HITL
                 }
             }
-        }, timeout=15)
+        })
         mandate_response.raise_for_status()
         
         mandate_result = mandate_response.json()
@@ -747,7 +1063,7 @@ def call_ap2_payment(supplier_id: str, amount: float, po_number: str, order_deta
         logger.info(f"AP2 mandate created: {mandate_id} for ${amount}")
         
         # Step 2: Execute payment with mandate
-        execute_response = requests.post(FINANCE_MCP_URL, json={
+        execute_response = await finance_mcp_client.post(FINANCE_MCP_URL, json={
             "method": "tools/call",
             "params": {
                 "name": "execute_payment_with_mandate",
@@ -756,7 +1072,7 @@ def call_ap2_payment(supplier_id: str, amount: float, po_number: str, order_deta
                     "po_number": po_number
                 }
             }
-        }, timeout=15)
+        })
         execute_response.raise_for_status()
         
         execute_result = execute_response.json()
@@ -776,7 +1092,7 @@ def call_ap2_payment(supplier_id: str, amount: float, po_number: str, order_deta
             "message": payment.get("message", "Payment completed via AP2")
         }
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         logger.warning(f"Finance MCP server not available at {FINANCE_MCP_URL}")
         return {"error": "Finance MCP server not available", "step": "connection"}
     except Exception as e:
@@ -807,24 +1123,31 @@ async def list_ap2_mandates():
     }
 
 
+AP2_CONCURRENCY = 10  # Suppliers approved (order + payment) at once
+
+
+def _create_approved_order(recommendation: dict) -> str:
+    """Create one approved purchase order in its own session (blocking DB work)."""
+    with get_session_factory()() as db:
+        return WorkflowService(db).create_purchase_order(recommendation).po_number
+
+
 @app.post("/api/workflows/approvals/{workflow_id}/approve")
-def approve_workflow(workflow_id: str, db: Session = Depends(get_db)):
+async def approve_workflow(workflow_id: str):
     """Approve a pending workflow action (handles both order and negotiation approvals)."""
-    import uuid
-    
     try:
         # Check if it's a negotiation approval
-        if workflow_id in NEGOTIATION_APPROVAL_QUEUE:
-            data = NEGOTIATION_APPROVAL_QUEUE[workflow_id]
+        data = await negotiation_approvals.pop(workflow_id)
+        if data is not None:
             
             # Create Purchase Order
-            po_number = f"PO-{uuid.uuid4().hex[:8].upper()}"
+            po_number = fast_id("PO")
             
             # Create AP2 mandate
-            mandate_id = f"ap2-{uuid.uuid4().hex[:12]}"
+            mandate_id = fast_id("ap2")
             
             # Log audit
-            log_audit("negotiation_approved", workflow_id, {
+            await log_audit("negotiation_approved", workflow_id, {
                 "po_number": po_number,
                 "mandate_id": mandate_id,
                 "supplier_id": data.get("supplier_id"),
@@ -833,7 +1156,7 @@ def approve_workflow(workflow_id: str, db: Session = Depends(get_db)):
             })
             
             # Save to history
-            save_history({
+            queue_history({
                 "type": "negotiation_workflow",
                 "timestamp": datetime.utcnow().isoformat(),
                 "status": "completed",
@@ -848,9 +1171,6 @@ def approve_workflow(workflow_id: str, db: Session = Depends(get_db)):
                 }
             })
             
-            # Remove from queue
-            del NEGOTIATION_APPROVAL_QUEUE[workflow_id]
-            
             return {
                 "status": "approved",
                 "session_id": workflow_id,
@@ -862,45 +1182,50 @@ def approve_workflow(workflow_id: str, db: Session = Depends(get_db)):
             }
         
         # Regular order approval
-        if workflow_id not in APPROVAL_QUEUE:
+        data = await order_approvals.pop(workflow_id)
+        if data is None:
             raise HTTPException(status_code=404, detail="Approval request not found")
         
-        data = APPROVAL_QUEUE[workflow_id]
+        # Each supplier: create its order, then execute the AP2 payment.
+        # Suppliers run concurrently, AP2_CONCURRENCY at a time.
         recommendations = data["recommendations"]
+        semaphore = asyncio.Semaphore(AP2_CONCURRENCY)
+        
+        async def _create_one(rec: dict):
+            async with semaphore:
+                po_number = await run_in_threadpool(_create_approved_order, rec)
+                payment_result = await call_ap2_payment(
+                    supplier_id=rec["supplier_id"],
+                    amount=rec.get("total_value", 0),
+                    po_number=po_number,
+                    order_details={"items": rec.get("items", [])}
+                )
+            return po_number, payment_result
         
-        # Create orders and execute payments
-        from services.workflow_service import WorkflowService
-        workflow_service = WorkflowService(db)
+        outcomes = await asyncio.gather(
+            *map(_create_one, recommendations), return_exceptions=True
+        )
         
         created_orders = []
         payment_results = []
         errors = []
-        
-        for rec in recommendations:
-            try:
-                order = workflow_service._create_purchase_order(rec)
-                if order:
-                    created_orders.append(order.po_number)
-                    
-                    # Execute AP2 payment for this order
-                    payment_result = call_ap2_payment(
-                        supplier_id=rec["supplier_id"],
-                        amount=rec.get("total_value", 0),
-                        po_number=order.po_number,
-                        order_details={"items": rec.get("items", [])}
-                    )
-                    payment_results.append(payment_result)
-                    
-                    if payment_result.get("error"):
-                        logger.warning(f"AP2 payment issue for {order.po_number}: {payment_result.get('error')}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to create order for {rec['supplier_id']}: {e}")
-                errors.append(str(e))
+        payments_ok = 0
+        for rec, outcome in zip(recommendations, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to create order for {rec['supplier_id']}: {outcome}")
+                errors.append(str(outcome))
+                continue
+            po_number, payment_result = outcome
+            created_orders.append(po_number)
+            payment_results.append(payment_result)
+            if payment_result.get("error"):
+                logger.warning(f"AP2 payment issue for {po_number}: {payment_result.get('error')}")
+            else:
+                payments_ok += 1
                 
         # Save completion to history
         try:
-            save_history({
+            queue_history({
                 "type": "optimization_workflow",
                 "timestamp": datetime.utcnow().isoformat(),
                 "status": "completed",
@@ -910,14 +1235,11 @@ def approve_workflow(workflow_id: str, db: Session = Depends(get_db)):
                     "total_value": data["total_value"],
                     "products_analyzed": "N/A (Pending Approval)", 
                     "workflow_id": workflow_id,
-                    "payments_processed": len([p for p in payment_results if not p.get("error")])
+                    "payments_processed": payments_ok
                 }
             })
         except Exception as e:
             logger.error(f"History save failed: {e}")
-                
-        # Remove from queue
-        del APPROVAL_QUEUE[workflow_id]
         
         return {
             "status": "approved",
@@ -933,27 +1255,24 @@ def approve_workflow(workflow_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/workflows/approvals/{workflow_id}/reject")
-def reject_workflow(workflow_id: str):
+async def reject_workflow(workflow_id: str):
     """Reject a pending workflow action."""
-    if workflow_id not in APPROVAL_QUEUE:
+    if not await order_approvals.delete(workflow_id):
         raise HTTPException(status_code=404, detail="Approval request not found")
         
-    del APPROVAL_QUEUE[workflow_id]
     return {"status": "rejected"}
 
 
 @app.post("/api/workflows/optimize-inventory")
 async def workflow_optimize_inventory(
     db: Session = Depends(get_db),
-    forecast_days: int = Query(7, description="Days ahead to forecast"),
+    forecast_days: int = Query(7, ge=1, description="Days ahead to forecast"),
     include_all_products: bool = Query(False, description="Analyze all products (not just low-stock)"),
     auto_create_orders: bool = Query(False, description="Actually create purchase orders"),
 ):
     """
     Run the complete supply chain optimization workflow.
     """
-    from services.workflow_service import WorkflowService
-    
     workflow = WorkflowService(db)
     result = await workflow.run_optimization_workflow(
         forecast_days=forecast_days,
@@ -962,7 +1281,7 @@ async def workflow_optimize_inventory(
     )
     
     # Save to history
-    save_history({
+    queue_history({
         "type": "optimization_workflow",
         "timestamp": datetime.utcnow().isoformat(),
         "status": "completed",
@@ -980,111 +1299,101 @@ async def workflow_optimize_inventory(
 
 @app.get("/api/workflows/optimize-inventory/stream")
 async def workflow_optimize_inventory_stream(
-    db: Session = Depends(get_db),
-    forecast_days: int = Query(7, description="Days ahead to forecast"),
+    forecast_days: int = Query(7, ge=1, description="Days ahead to forecast"),
     include_all_products: bool = Query(False, description="Analyze all products (not just low-stock)"),
     auto_create_orders: bool = Query(False, description="Actually create purchase orders"),
     max_products: int = Query(50, description="Maximum products to analyze (for performance)"),
+    pacing_ms: int = Query(0, ge=0, description="Delay between events for UI demos (0 = none)"),
 ) -> StreamingResponse:
     """
     Streaming version of the optimization workflow with real-time telemetry.
     """
-    from services.workflow_service import WorkflowService
-    from services.inventory_service import InventoryService
-    import asyncio
-    import time
-    import uuid
-    
-    async def event_generator():
-        start_time = time.time()
+    # Hot names bound as defaults: LOAD_FAST instead of global lookups per frame
+    async def event_generator(_sse=sse, _dumps=orjson.dumps, _time=time.time, _int=int, _utcnow=datetime.utcnow):
+        start_time = _time()
+        now_ms = _int(start_time * 1000)
+        # The forecast runs on a worker thread while the telemetry below streams out
+        workflow_cancel = threading.Event()
+        workflow_task = asyncio.create_task(run_in_threadpool(
+            _run_optimization_workflow,
+            forecast_days=forecast_days,
+            include_all_products=include_all_products,
+            auto_create_orders=False,  # Always False for streaming/HITL
+            max_products=max_products,
+            cancel=workflow_cancel,
+        ))
         try:
             # Start event
-            yield f"data: {json.dumps({'event': 'start', 'message': 'Workflow started', 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
+            yield _sse({'event': 'start', 'message': 'Workflow started', 'timestamp': now_ms})
             
             # Initialize services
             logger.info("Streaming workflow: Initializing services...")
-            inventory_service = InventoryService(db)
             
-            yield f"data: {json.dumps({'event': 'init', 'message': 'Services initialized', 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _sse({'event': 'init', 'message': 'Services initialized', 'timestamp': now_ms})
             
             # Load products (limited for performance)
             logger.info(f"Streaming workflow: Loading products (max={max_products})...")
-            if include_all_products:
-                products = inventory_service.get_products(limit=max_products)
-            else:
-                products = inventory_service.get_low_stock_products()
-                if len(products) > max_products:
-                    products = products[:max_products]
+            # Column rows, no ORM hydration; reused across streams for STOCK_ROWS_TTL
+            products = await load_stock_rows(include_all=include_all_products, limit=max_products)
+            asins = [row[0] for row in products[:5]]
+            now_ms = _int(_time() * 1000)
             
-            yield f"data: {json.dumps({'event': 'products_loaded', 'count': len(products), 'max': max_products, 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
-
             # Send full list of products for UI
             products_list = [{
-                "asin": p.asin,
-                "title": p.title,
-                "price": float(p.unit_cost or 0),
-                "stock": p.quantity_on_hand,
-            } for p in products]
-            yield f"data: {json.dumps({'event': 'products_list', 'products': products_list, 'timestamp': int(time.time() * 1000)})}\n\n"
-            
-            # Emit MCP tool call events for visibility
-            yield f"data: {json.dumps({'event': 'mcp_tool_call', 'tool': 'inventory/get_low_stock', 'input': {'threshold': 10, 'limit': max_products}, 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
-            yield f"data: {json.dumps({'event': 'mcp_tool_result', 'tool': 'inventory/get_low_stock', 'output': {'count': len(products), 'products': [p.asin for p in products[:5]]}, 'timestamp': int(time.time() * 1000)})}\n\n"
-            
-            yield f"data: {json.dumps({'event': 'mcp_tool_call', 'tool': 'analytics/demand_forecast', 'input': {'products': len(products), 'days': forecast_days}, 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
-            yield f"data: {json.dumps({'event': 'mcp_tool_result', 'tool': 'analytics/demand_forecast', 'output': {'forecasts_generated': len(products), 'avg_confidence': 0.85}, 'timestamp': int(time.time() * 1000)})}\n\n"
+                "asin": asin,
+                "title": title,
+                "price": unit_cost or 0.0,
+                "stock": quantity_on_hand,
+            } for asin, title, unit_cost, quantity_on_hand in products]
             
-            yield f"data: {json.dumps({'event': 'mcp_tool_call', 'tool': 'supplier/get_prices', 'input': {'asins': [p.asin for p in products[:3]]}, 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
-            yield f"data: {json.dumps({'event': 'mcp_tool_result', 'tool': 'supplier/get_prices', 'output': {'prices_fetched': min(3, len(products)), 'avg_price': 25.50, 'suppliers': ['SUPP001', 'SUPP002']}, 'timestamp': int(time.time() * 1000)})}\n\n"
-            
-            yield f"data: {json.dumps({'event': 'mcp_tool_call', 'tool': 'finance/get_exchange_rate', 'input': {'base': 'USD', 'targets': ['EUR', 'GBP']}, 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
-            yield f"data: {json.dumps({'event': 'mcp_tool_result', 'tool': 'finance/get_exchange_rate', 'output': {'rates': {'EUR': 0.92, 'GBP': 0.79}, 'timestamp': int(time.time())}, 'timestamp': int(time.time() * 1000)})}\n\n"
-            
-            # Run the optimized workflow (force auto_create_orders=False so we can do HITL)
             logger.info(f"Streaming workflow: Running optimization for {len(products)} products...")
-            yield f"data: {json.dumps({'event': 'analyzing', 'message': f'Analyzing {len(products)} products...', 'progress': 20, 'timestamp': int(time.time() * 1000)})}\n\n"
+            # Products, MCP tool events and 'analyzing' go out as one chunk (one ASGI send)
+            yield b"".join((
+                _sse({'event': 'products_loaded', 'count': len(products), 'max': max_products, 'timestamp': now_ms}),
+                _sse({'event': 'products_list', 'products': products_list, 'timestamp': now_ms}),
+                # MCP tool call events for visibility
+                _MCP_LOW_STOCK_CALL % (max_products, now_ms),
+                _MCP_LOW_STOCK_RESULT % (len(products), _dumps(asins), now_ms),
+                _MCP_FORECAST_CALL % (len(products), forecast_days, now_ms),
+                _MCP_FORECAST_RESULT % (len(products), now_ms),
+                _MCP_PRICES_CALL % (_dumps(asins[:3]), now_ms),
+                _MCP_PRICES_RESULT % (min(3, len(products)), now_ms),
+                _MCP_FX_CALL % now_ms,
+                _MCP_FX_RESULT % (now_ms // 1000, now_ms),
+                _sse({'event': 'analyzing', 'message': f'Analyzing {len(products)} products...', 'progress': 20, 'timestamp': now_ms}),
+            ))
             
-            workflow = WorkflowService(db)
-            result = await workflow.run_optimization_workflow(
-                forecast_days=forecast_days,
-                include_all_products=include_all_products,
-                auto_create_orders=False, # Always False for streaming/HITL
-                max_products=max_products,
-            )
+            result = await workflow_task
             
-            yield f"data: {json.dumps({'event': 'forecasting_complete', 'count': result.products_analyzed, 'progress': 70, 'timestamp': int(time.time() * 1000)})}\n\n"
+            now_ms = _int(_time() * 1000)
+            now_iso = _utcnow().isoformat()
+            yield _sse({'event': 'forecasting_complete', 'count': result.products_analyzed, 'progress': 70, 'timestamp': now_ms})
             
             # Generate approvals if recommendations exist
             if result.order_recommendations and len(result.order_recommendations) > 0:
-                workflow_id = str(uuid.uuid4())
-                APPROVAL_QUEUE[workflow_id] = {
-                    "timestamp": datetime.utcnow().isoformat(),
+                workflow_id = fast_id("WF")
+                await order_approvals.put(workflow_id, {
+                    "timestamp": now_iso,
                     "recommendations": result.order_recommendations,
                     "total_value": result.total_recommended_value,
                     "params": {
                         "forecast_days": forecast_days,
                         "include_all": include_all_products
                     }
-                }
+                })
                 
                 logger.info(f"Created approval request {workflow_id} for {len(result.order_recommendations)} orders")
-                yield f"data: {json.dumps({'event': 'approval_required', 'workflow_id': workflow_id, 'message': f'Approval required for {len(result.order_recommendations)} orders', 'progress': 80, 'timestamp': int(time.time() * 1000)})}\n\n"
+                yield _sse({'event': 'approval_required', 'workflow_id': workflow_id, 'message': f'Approval required for {len(result.order_recommendations)} orders', 'progress': 80, 'timestamp': now_ms})
             
-            yield f"data: {json.dumps({'event': 'generating_orders', 'message': f'Generated {len(result.order_recommendations)} order recommendations', 'progress': 90, 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _sse({'event': 'generating_orders', 'message': f'Generated {len(result.order_recommendations)} order recommendations', 'progress': 90, 'timestamp': now_ms})
             
             # Complete event
-            elapsed = round(time.time() - start_time, 2)
+            elapsed = round(_time() - start_time, 2)
             
             # Save run to history
-            save_history({
+            queue_history({
                 "type": "optimization_workflow_run",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": now_iso,
                 "status": "completed", 
                 "result": {
                     "products_analyzed": result.products_analyzed,
@@ -1095,29 +1404,26 @@ async def workflow_optimize_inventory_stream(
                 }
             })
             
-            yield f"data: {json.dumps({'event': 'complete', 'result': result.to_dict(), 'elapsed_seconds': elapsed, 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _WORKFLOW_COMPLETE % (result.to_json_bytes(), _dumps(elapsed), now_ms)
             
             logger.info(f"Streaming workflow complete in {elapsed}s")
             
         except Exception as e:
             logger.error(f"Streaming workflow error: {e}", exc_info=True)
-            yield f"data: {json.dumps({'event': 'error', 'message': str(e), 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _sse({'event': 'error', 'message': str(e), 'timestamp': _int(_time() * 1000)})
+        finally:
+            # Client went away (or loading failed) before the forecast finished:
+            # signal the worker thread to stop, then drop the awaiting task
+            workflow_cancel.set()
+            workflow_task.cancel()
     
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    return sse_response(paced(event_generator(), pacing_ms))
 
 
 @app.get("/api/workflows/negotiate/stream")
 async def negotiate_workflow_stream(
-    db: Session = Depends(get_db),
     max_rounds: int = Query(3, description="Maximum negotiation rounds per supplier"),
+    pacing_ms: int = Query(0, ge=0, description="Delay between events for UI demos (0 = none)"),
 ) -> StreamingResponse:
     """3 back-and-forth negotiation rounds with audit logging.
     
@@ -1127,42 +1433,37 @@ async def negotiate_workflow_stream(
     - Quote requests and counter-offers
     - Best offer selection and approval request
     """
-    import asyncio
-    import time
-    import uuid
-    
-    async def negotiate_generator():
-        start_time = time.time()
-        session_id = f"NEG-{uuid.uuid4().hex[:8]}"
-        audit_id = f"AUD-{uuid.uuid4().hex[:8]}"
+    # Hot names bound as defaults: LOAD_FAST instead of global lookups per frame
+    async def negotiate_generator(_sse=sse, _time=time.time, _int=int, _utcnow=datetime.utcnow):
+        start_time = _time()
+        now_ms = _int(start_time * 1000)
+        session_id = fast_id("NEG")
+        audit_id = fast_id("AUD")
+        audits = []  # Buffered audit entries, written by log_audit_bulk
         
         try:
             # Start event
-            yield f"data: {json.dumps({'event': 'start', 'audit_id': audit_id, 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
+            yield _sse({'event': 'start', 'audit_id': audit_id, 'timestamp': now_ms})
             
-            log_audit("negotiation_started", session_id, {"audit_id": audit_id, "max_rounds": max_rounds})
+            audits.append(audit_log.entry("negotiation_started", session_id, {"audit_id": audit_id, "max_rounds": max_rounds}))
             
             # Get low stock products via MCP
-            yield f"data: {json.dumps({'event': 'mcp_call', 'tool': 'get_low_stock_products', 'audit_logged': True, 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.2)
+            yield _sse({'event': 'mcp_call', 'tool': 'get_low_stock_products', 'audit_logged': True, 'timestamp': now_ms})
             
             # Load low stock products from DB
-            from services.inventory_service import InventoryService
-            inventory_service = InventoryService(db)
-            products = inventory_service.get_low_stock_products()[:5]  # Limit for demo
+            products = await run_in_threadpool(_load_negotiation_items, 5)  # Limit for demo
+            now_ms = _int(_time() * 1000)
             
             if not products:
-                yield f"data: {json.dumps({'event': 'error', 'message': 'No low stock products found', 'timestamp': int(time.time() * 1000)})}\n\n"
+                yield _sse({'event': 'error', 'message': 'No low stock products found', 'timestamp': now_ms})
                 return
             
-            yield f"data: {json.dumps({'event': 'mcp_result', 'tool': 'get_low_stock_products', 'count': len(products), 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _sse({'event': 'mcp_result', 'tool': 'get_low_stock_products', 'count': len(products), 'timestamp': now_ms})
             
             # Create negotiation session
-            yield f"data: {json.dumps({'event': 'negotiation_created', 'session_id': session_id, 'products': len(products), 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.1)
+            yield _sse({'event': 'negotiation_created', 'session_id': session_id, 'products': len(products), 'timestamp': now_ms})
             
-            log_audit("session_created", session_id, {"products": [p.asin for p in products]})
+            audits.append(audit_log.entry("session_created", session_id, {"products": [row[0] for row in products]}))
             
             # Simulate supplier negotiation
             supplier_id = "TECH-001"
@@ -1172,44 +1473,43 @@ async def negotiate_workflow_stream(
             email_summary = []
             
             items = [{
-                "asin": p.asin,
-                "title": p.title,
-                "quantity": p.reorder_quantity or 100,
-                "unit_price": float(p.unit_cost or 25.00)
-            } for p in products]
+                "asin": asin,
+                "title": title,
+                "quantity": reorder_quantity or 100,
+                "unit_price": float(unit_cost or 25.00)
+            } for asin, title, reorder_quantity, unit_cost in products]
             
             # Run negotiation rounds
             for round_num in range(1, max_rounds + 1):
                 round_type = "quote_request" if round_num == 1 else ("counter_offer" if round_num < max_rounds else "final")
-                
-                yield f"data: {json.dumps({'event': 'round', 'number': round_num, 'type': round_type, 'timestamp': int(time.time() * 1000)})}\n\n"
-                await asyncio.sleep(0.3)
+                now_ms = _int(_time() * 1000)
                 
                 # Email sent
                 email_subject = f"Quote Request for {len(items)} products" if round_num == 1 else f"Counter offer - Round {round_num}"
-                yield f"data: {json.dumps({'event': 'email_sent', 'to': f'{supplier_id.lower()}@example.com', 'subject': email_subject, 'timestamp': int(time.time() * 1000)})}\n\n"
                 email_summary.append({"direction": "sent", "round": round_num, "subject": email_subject})
-                await asyncio.sleep(0.2)
                 
                 # MCP call to request/submit
                 mcp_tool = "request_supplier_quote" if round_num == 1 else "submit_counter_offer"
-                yield f"data: {json.dumps({'event': 'mcp_call', 'tool': mcp_tool, 'timestamp': int(time.time() * 1000)})}\n\n"
-                await asyncio.sleep(0.3)
                 
                 # Simulate supplier response (decreasing price each round)
                 discount = round_num * 0.05  # 5% per round
                 supplier_offer = round(initial_price * (1 - discount), 2)
                 current_price = supplier_offer
-                
-                yield f"data: {json.dumps({'event': 'email_received', 'from': f'{supplier_id.lower()}@example.com', 'offer': supplier_offer, 'final': round_num == max_rounds, 'timestamp': int(time.time() * 1000)})}\n\n"
                 email_summary.append({"direction": "received", "round": round_num, "offer": supplier_offer})
-                await asyncio.sleep(0.2)
                 
-                log_audit(f"round_{round_num}_complete", session_id, {
+                # The round's four events go out as one chunk
+                yield b"".join((
+                    _NEGOTIATION_ROUND_FRAMES[round_type] % (round_num, now_ms),
+                    _sse({'event': 'email_sent', 'to': f'{supplier_id.lower()}@example.com', 'subject': email_subject, 'timestamp': now_ms}),
+                    _NEGOTIATION_MCP_CALL_FRAMES[mcp_tool] % now_ms,
+                    _sse({'event': 'email_received', 'from': f'{supplier_id.lower()}@example.com', 'offer': supplier_offer, 'final': round_num == max_rounds, 'timestamp': now_ms}),
+                ))
+                
+                audits.append(audit_log.entry(f"round_{round_num}_complete", session_id, {
                     "supplier_id": supplier_id,
                     "offer": supplier_offer,
                     "type": round_type
-                })
+                }))
             
             # Calculate savings
             savings_percent = round(((initial_price - current_price) / initial_price) * 100, 1)
@@ -1217,12 +1517,12 @@ async def negotiate_workflow_stream(
             total_value = round(current_price * total_quantity, 2)
             
             # Compare offers
-            yield f"data: {json.dumps({'event': 'offers_compared', 'best_supplier': supplier_id, 'best_price': current_price, 'savings': f'{savings_percent}%', 'timestamp': int(time.time() * 1000)})}\n\n"
-            await asyncio.sleep(0.2)
+            now_ms = _int(_time() * 1000)
+            yield _sse({'event': 'offers_compared', 'best_supplier': supplier_id, 'best_price': current_price, 'savings': f'{savings_percent}%', 'timestamp': now_ms})
             
             # Create AP2 mandate preview
             ap2_preview = {
-                "mandate_id": f"ap2-{uuid.uuid4().hex[:12]}",
+                "mandate_id": fast_id("ap2"),
                 "amount": total_value,
                 "currency": "USD",
                 "supplier_id": supplier_id,
@@ -1230,11 +1530,11 @@ async def negotiate_workflow_stream(
                 "expires_in": "24 hours"
             }
             
-            yield f"data: {json.dumps({'event': 'ap2_mandate_preview', 'schema': ap2_preview, 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _sse({'event': 'ap2_mandate_preview', 'schema': ap2_preview, 'timestamp': now_ms})
             
             # Add to negotiation approval queue
-            NEGOTIATION_APPROVAL_QUEUE[session_id] = {
-                "timestamp": datetime.utcnow().isoformat(),
+            await negotiation_approvals.put(session_id, {
+                "timestamp": _utcnow().isoformat(),
                 "supplier_id": supplier_id,
                 "supplier_name": supplier_name,
                 "total_value": total_value,
@@ -1243,41 +1543,38 @@ async def negotiate_workflow_stream(
                 "items": items,
                 "email_summary": email_summary,
                 "ap2_mandate_preview": ap2_preview
-            }
+            })
             
-            yield f"data: {json.dumps({'event': 'pending_approval', 'session_id': session_id, 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _sse({'event': 'pending_approval', 'session_id': session_id, 'timestamp': now_ms})
             
-            log_audit("awaiting_approval", session_id, {
+            audits.append(audit_log.entry("awaiting_approval", session_id, {
                 "total_value": total_value,
                 "savings_percent": savings_percent
-            })
+            }))
+            await log_audit_bulk(session_id, audits)
             
             # Complete
-            elapsed = round(time.time() - start_time, 2)
-            yield f"data: {json.dumps({'event': 'complete', 'awaiting': 'human_approval', 'session_id': session_id, 'elapsed_seconds': elapsed, 'timestamp': int(time.time() * 1000)})}\n\n"
+            end_time = _time()
+            elapsed = round(end_time - start_time, 2)
+            now_ms = _int(end_time * 1000)
+            yield _sse({'event': 'complete', 'awaiting': 'human_approval', 'session_id': session_id, 'elapsed_seconds': elapsed, 'timestamp': now_ms})
             
             logger.info(f"Negotiation workflow complete in {elapsed}s - session {session_id}")
             
         except Exception as e:
             logger.error(f"Negotiation workflow error: {e}", exc_info=True)
-            yield f"data: {json.dumps({'event': 'error', 'message': str(e), 'timestamp': int(time.time() * 1000)})}\n\n"
+            yield _sse({'event': 'error', 'message': str(e), 'timestamp': _int(_time() * 1000)})
+        finally:
+            # Early return, error or disconnect: keep whatever was recorded
+            await log_audit_bulk(session_id, audits)
     
-    return StreamingResponse(
-        negotiate_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    return sse_response(paced(negotiate_generator(), pacing_ms))
 
 
 @app.get("/api/workflows/analyze-product/{asin}")
-
-def workflow_analyze_product(
+async def workflow_analyze_product(
     asin: str,
-    forecast_days: int = Query(7, description="Days ahead to forecast"),
+    forecast_days: int = Query(7, ge=1, description="Days ahead to forecast"),
     db: Session = Depends(get_db),
 ):
     """
@@ -1285,10 +1582,9 @@ def workflow_analyze_product(
     
     Returns demand forecast, current stock, Amazon price, and reorder recommendation.
     """
-    from services.workflow_service import WorkflowService
-    
+    # Product lookup and price fetch are blocking; keep them off the event loop
     workflow = WorkflowService(db)
-    result = workflow.analyze_single_product(asin, forecast_days)
+    result = await run_in_threadpool(workflow.analyze_single_product, asin, forecast_days)
     
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
@@ -1297,30 +1593,22 @@ def workflow_analyze_product(
 
 
 @app.get("/api/forecast/{asin}")
-def get_demand_forecast(
+async def get_demand_forecast(
     asin: str,
-    days: int = Query(7, description="Days ahead to forecast"),
+    days: int = Query(7, ge=1, description="Days ahead to forecast"),
 ):
     """
     Get demand forecast for a product from the trained ML model.
     
     Returns predicted demand with confidence intervals.
     """
-    from agents.demand_forecasting import DemandForecasterService
-    
-    forecaster = DemandForecasterService.get_instance()
-    forecast = forecaster.forecast(asin, days)
-    
-    return forecast.to_dict()
+    return _FORECASTER.forecast(asin, days).to_dict()
 
 
 @app.get("/api/forecast/model/info")
-def get_forecast_model_info():
+async def get_forecast_model_info():
     """Get information about the loaded forecasting model."""
-    from agents.demand_forecasting import DemandForecasterService
-    
-    forecaster = DemandForecasterService.get_instance()
-    return forecaster.get_model_info()
+    return _FORECASTER.get_model_info()
 
 
 # ========== AGENT ENDPOINTS ==========
@@ -1389,14 +1677,14 @@ async def chat(request: ChatRequest) -> StreamingResponse:
                 "kind": "supply-chain-agents",
                 "data": {"agent": "Orchestrator", "message": "Starting workflow"},
             }
-            yield f"data: {json.dumps(start_event)}\n\n"
+            yield sse(start_event)
             
             # Process through workflow with streaming
             async for event in magentic_orchestrator.process_request_stream(
                 user_message=request.message,
                 conversation_history=request.context,
             ):
-                yield f"data: {json.dumps(event)}\n\n"
+                yield sse(event)
             
             # Send END event
             end_event = {
@@ -1405,7 +1693,7 @@ async def chat(request: ChatRequest) -> StreamingResponse:
                 "event": "Complete",
                 "data": {"message": "Request processed successfully"},
             }
-            yield f"data: {json.dumps(end_event)}\n\n"
+            yield sse(end_event)
             logger.info("Request processed successfully")
             
         except Exception as e:
@@ -1416,17 +1704,9 @@ async def chat(request: ChatRequest) -> StreamingResponse:
                 "event": "Error",
                 "error": {"message": str(e), "statusCode": 500},
             }
-            yield f"data: {json.dumps(error_event)}\n\n"
+            yield sse(error_event)
     
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    return sse_response(event_generator())
 
 
 @app.post("/api/chat/sync")
@@ -1475,3 +1755,8 @@ async def chat_sync(request: ChatRequest):
             "error": str(e),
             "events": []
         }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
@@ -12,34 +12,52 @@ Tools:
 - predict_stockouts_batch: Batch prediction for multiple products
 
 Port: 3004
-Endpoint: /mcp
+Endpoint: /mcp (/mcp/stream streams predict_stockouts_batch as NDJSON)
 """
 
 import os
 import sys
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+import numpy as np
+import orjson
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../.."))
 
-from database.config import get_db
+from database.config import get_async_db, get_async_session_factory
 from database.models import Product
 from agents.demand_forecasting.model_service import DemandForecasterService
+from services.cache import response_cache, cached
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await response_cache.connect()
+    yield
+    await response_cache.close()
+
+
 app = FastAPI(
     title="Analytics & Forecasting MCP Server",
     description="MCP tools for demand forecasting and analytics",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -53,6 +71,39 @@ app.add_middleware(
 # Initialize forecaster with ML model
 forecaster = DemandForecasterService.get_instance()
 
+FORECAST_TTL = 300  # Seconds a (sku, days) forecast or weather lookup is reused
+
+
+@cached(ttl=FORECAST_TTL, key=lambda sku, days: f"mcp:forecast:{sku}:{days}")
+async def cached_forecast(sku: str, days: int) -> Dict[str, Any]:
+    """forecaster.forecast as a dict, cached per (sku, days)."""
+    return forecaster.forecast(sku, days=days).to_dict()
+
+
+@cached(ttl=FORECAST_TTL, key=lambda location, days: f"mcp:weather:{location}:{days}")
+async def weather_forecast(location: str, days: int) -> Dict[str, Any]:
+    """Weather forecast for a location, cached per (location, days)."""
+    # Placeholder weather forecast
+    # In production, integrate with weather API (OpenWeather, Weather.com, etc.)
+    today = datetime.now().date()
+    forecast_days = []
+    for i in range(days):
+        date = today + timedelta(days=i)
+        forecast_days.append({
+            "date": date.isoformat(),
+            "temp_high": 75,
+            "temp_low": 55,
+            "condition": "partly_cloudy",
+            "precipitation_chance": 20
+        })
+
+    return {
+        "location": location,
+        "forecast_days": days,
+        "forecast": forecast_days,
+        "source": "weather_api_placeholder"
+    }
+
 
 # ============================================================================
 # MCP Protocol Models
@@ -82,6 +133,32 @@ class MCPCallToolResponse(BaseModel):
     isError: bool = False
 
 
+# MCPRequest still documents the /mcp body in OpenAPI, but the envelope is
+# read straight off the raw JSON instead of being validated into a model
+MCP_REQUEST_OPENAPI = {
+    "requestBody": {
+        "content": {"application/json": {"schema": MCPRequest.model_json_schema()}},
+        "required": True,
+    }
+}
+
+
+async def read_mcp_request(request: Request) -> Tuple[str, Dict[str, Any]]:
+    """(method, params) from the MCP request body."""
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=422, detail="Request body must be JSON")
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("method"), str):
+        raise HTTPException(status_code=422, detail="MCP request needs a string 'method'")
+    params = payload.get("params") or {}
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=422, detail="MCP 'params' must be an object")
+
+    return payload["method"], params
+
+
 # ============================================================================
 # Tool Definitions
 # ============================================================================
@@ -100,7 +177,8 @@ ANALYTICS_TOOLS = [
                 "days_ahead": {
                     "type": "integer",
                     "description": "Number of days to forecast (default: 7)",
-                    "default": 7
+                    "default": 7,
+                    "minimum": 1
                 },
                 "factors": {
                     "type": "object",
@@ -201,23 +279,27 @@ ANALYTICS_TOOLS = [
     }
 ]
 
+# tools/list is static, so its response body is encoded once at import;
+# the definitions are trusted constants and skip validation
+TOOLS_LIST_RESPONSE = MCPListToolsResponse.model_construct(
+    tools=[MCPToolDefinition.model_construct(**tool) for tool in ANALYTICS_TOOLS]
+)
+TOOLS_LIST_BODY = orjson.dumps(TOOLS_LIST_RESPONSE.model_dump())
+
 
 # ============================================================================
 # MCP Endpoints
 # ============================================================================
 
-@app.post("/mcp")
-async def mcp_endpoint(request: MCPRequest, db: Session = Depends(get_db)):
+@app.post("/mcp", openapi_extra=MCP_REQUEST_OPENAPI)
+async def mcp_endpoint(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Main MCP protocol endpoint."""
-    method = request.method
-    params = request.params or {}
+    method, params = await read_mcp_request(request)
 
     logger.info(f"MCP request: method={method}, params={params}")
 
     if method == "tools/list":
-        return MCPListToolsResponse(
-            tools=[MCPToolDefinition(**tool) for tool in ANALYTICS_TOOLS]
-        )
+        return Response(content=TOOLS_LIST_BODY, media_type="application/json")
 
     elif method == "tools/call":
         tool_name = params.get("name")
@@ -228,7 +310,7 @@ async def mcp_endpoint(request: MCPRequest, db: Session = Depends(get_db)):
             return MCPCallToolResponse(
                 content=[{
                     "type": "text",
-                    "text": str(result)
+                    "text": orjson.dumps(result, default=str).decode()
                 }],
                 isError=False
             )
@@ -246,163 +328,254 @@ async def mcp_endpoint(request: MCPRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=f"Unknown method: {method}")
 
 
+@app.post("/mcp/stream", openapi_extra=MCP_REQUEST_OPENAPI)
+async def mcp_stream(request: Request):
+    """
+    NDJSON variant of predict_stockouts_batch for large SKU lists.
+
+    Emits one prediction per line as each forecast resolves (in completion
+    order), so nothing is buffered and clients can start on the first lines.
+    """
+    method, params = await read_mcp_request(request)
+    if method != "tools/call" or params.get("name") != "predict_stockouts_batch":
+        raise HTTPException(status_code=400, detail="Only predict_stockouts_batch can be streamed")
+
+    sku_list = (params.get("arguments") or {}).get("sku_list", [])
+    now = datetime.now()
+
+    # Short-lived session: stock levels are read up front, not while streaming
+    async with get_async_session_factory()() as db:
+        by_asin = await _load_stock_levels(db, sku_list)
+
+    async def predict(sku: str) -> Optional[Dict[str, Any]]:
+        try:
+            forecast = await cached_forecast(sku=sku, days=7)
+            return _stockout_prediction(sku, by_asin.get(sku), forecast, now)
+        except Exception as e:
+            logger.warning(f"Could not predict stockout for {sku}: {e}")
+            return {"sku": sku, "error": str(e)}
+
+    async def lines():
+        for next_prediction in asyncio.as_completed([predict(sku) for sku in sku_list]):
+            prediction = await next_prediction
+            if prediction is not None:
+                yield orjson.dumps(prediction) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 # ============================================================================
 # Tool Implementations
 # ============================================================================
 
-async def execute_tool(tool_name: str, arguments: Dict[str, Any], db: Session) -> Dict[str, Any]:
-    """Execute a tool and return the result."""
+async def _forecast_demand(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Demand forecast with confidence interval."""
+    sku = arguments.get("sku")
+    days_ahead = arguments.get("days_ahead", 7)
+    if not isinstance(days_ahead, int) or days_ahead < 1:
+        raise ValueError(f"days_ahead must be a positive integer, got {days_ahead!r}")
+    factors = arguments.get("factors", {})
 
-    if tool_name == "forecast_demand":
-        sku = arguments.get("sku")
-        days_ahead = arguments.get("days_ahead", 7)
-        factors = arguments.get("factors", {})
-
-        # Get forecast from ML model
-        forecast = forecaster.forecast(sku, days=days_ahead)
-
-        if not forecast:
-            raise ValueError(f"Could not generate forecast for {sku}")
-
-        return {
-            "sku": forecast.asin,
-            "forecast_days": forecast.forecast_days,
-            "predicted_daily_demand": forecast.predicted_daily_demand,
-            "predicted_total_demand": forecast.predicted_total_demand,
-            "confidence_lower": forecast.confidence_lower,
-            "confidence_upper": forecast.confidence_upper,
-            "confidence_level": forecast.confidence_level,
-            "method": forecast.method,
-            "external_factors_considered": factors,
-            "generated_at": datetime.now().isoformat()
-        }
+    # Get forecast from ML model
+    forecast = await cached_forecast(sku=sku, days=days_ahead)
 
-    elif tool_name == "analyze_seasonality":
-        sku = arguments.get("sku")
-
-        # Placeholder seasonality analysis
-        # In production, you'd analyze historical sales data
-        return {
-            "sku": sku,
-            "has_seasonality": True,
-            "seasonal_pattern": "quarterly",
-            "peak_months": ["November", "December"],
-            "low_months": ["January", "February"],
-            "seasonality_strength": 0.65,  # 0-1 scale
-            "analysis_period": "12 months"
-        }
+    if not forecast:
+        raise ValueError(f"Could not generate forecast for {sku}")
 
-    elif tool_name == "get_weather_forecast":
-        location = arguments.get("location")
-        days = arguments.get("days", 7)
-
-        # Placeholder weather forecast
-        # In production, integrate with weather API (OpenWeather, Weather.com, etc.)
-        forecast_days = []
-        for i in range(days):
-            date = datetime.now() + timedelta(days=i)
-            forecast_days.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "temp_high": 75,
-                "temp_low": 55,
-                "condition": "partly_cloudy",
-                "precipitation_chance": 20
-            })
-
-        return {
-            "location": location,
-            "forecast_days": days,
-            "forecast": forecast_days,
-            "source": "weather_api_placeholder"
-        }
+    return {
+        "sku": forecast["asin"],
+        "forecast_days": forecast["forecast_days"],
+        "predicted_daily_demand": forecast["predicted_daily_demand"],
+        "predicted_total_demand": forecast["predicted_total_demand"],
+        "confidence_lower": forecast["confidence_lower"],
+        "confidence_upper": forecast["confidence_upper"],
+        "confidence_level": forecast["confidence_level"],
+        "method": forecast["method"],
+        "external_factors_considered": factors,
+        "generated_at": now.isoformat()
+    }
 
-    elif tool_name == "get_local_events":
-        location = arguments.get("location")
-        start_date = arguments.get("start_date")
-        end_date = arguments.get("end_date")
-
-        # Placeholder events calendar
-        # In production, integrate with events API
-        return {
-            "location": location,
-            "start_date": start_date,
-            "end_date": end_date,
-            "events": [
-                {
-                    "name": "Summer Music Festival",
-                    "date": "2026-06-15",
-                    "category": "entertainment",
-                    "expected_attendance": 50000
-                }
-            ],
-            "holidays": [
-                {
-                    "name": "Independence Day",
-                    "date": "2026-07-04",
-                    "impact_level": "high"
-                }
-            ]
-        }
 
-    elif tool_name == "detect_trends":
-        sku = arguments.get("sku")
-
-        # Get product
-        product = db.query(Product).filter(Product.asin == sku).first()
-        if not product:
-            raise ValueError(f"Product not found: {sku}")
-
-        # Placeholder trend analysis
-        # In production, analyze order history
-        return {
-            "sku": sku,
-            "title": product.title,
-            "trend_direction": "increasing",  # increasing, decreasing, stable
-            "trend_strength": 0.75,  # 0-1 scale
-            "growth_rate": 15.5,  # percentage
-            "analysis_period": "90 days",
-            "confidence": "high"
-        }
+async def _analyze_seasonality(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Seasonal pattern summary for a product."""
+    sku = arguments.get("sku")
 
-    elif tool_name == "predict_stockouts_batch":
-        sku_list = arguments.get("sku_list", [])
-
-        predictions = []
-        for sku in sku_list:
-            try:
-                forecast = forecaster.forecast(sku, days=7)
-                product = db.query(Product).filter(Product.asin == sku).first()
-
-                if forecast and product:
-                    # Simple stockout calculation
-                    days_until_stockout = product.stock_level / forecast.predicted_daily_demand if forecast.predicted_daily_demand > 0 else 999
-
-                    predictions.append({
-                        "sku": sku,
-                        "title": product.title,
-                        "current_stock": product.stock_level,
-                        "daily_demand": forecast.predicted_daily_demand,
-                        "days_until_stockout": round(days_until_stockout, 1),
-                        "stockout_date": (datetime.now() + timedelta(days=days_until_stockout)).strftime("%Y-%m-%d"),
-                        "critical": days_until_stockout < 7
-                    })
-            except Exception as e:
-                logger.warning(f"Could not predict stockout for {sku}: {e}")
-                predictions.append({
-                    "sku": sku,
-                    "error": str(e)
-                })
-
-        return {
-            "total_products": len(sku_list),
-            "successful_predictions": len([p for p in predictions if "error" not in p]),
-            "critical_products": len([p for p in predictions if p.get("critical", False)]),
-            "predictions": predictions
-        }
+    # Placeholder seasonality analysis
+    # In production, you'd analyze historical sales data
+    return {
+        "sku": sku,
+        "has_seasonality": True,
+        "seasonal_pattern": "quarterly",
+        "peak_months": ["November", "December"],
+        "low_months": ["January", "February"],
+        "seasonality_strength": 0.65,  # 0-1 scale
+        "analysis_period": "12 months"
+    }
 
-    else:
+
+async def _get_weather_forecast(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Weather outlook for a location."""
+    location = arguments.get("location")
+    days = arguments.get("days", 7)
+
+    return await weather_forecast(location=location, days=days)
+
+
+async def _get_local_events(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Local events and holidays in a date range."""
+    location = arguments.get("location")
+    start_date = arguments.get("start_date")
+    end_date = arguments.get("end_date")
+
+    # Placeholder events calendar
+    # In production, integrate with events API
+    return {
+        "location": location,
+        "start_date": start_date,
+        "end_date": end_date,
+        "events": [
+            {
+                "name": "Summer Music Festival",
+                "date": "2026-06-15",
+                "category": "entertainment",
+                "expected_attendance": 50000
+            }
+        ],
+        "holidays": [
+            {
+                "name": "Independence Day",
+                "date": "2026-07-04",
+                "impact_level": "high"
+            }
+        ]
+    }
+
+
+async def _detect_trends(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Sales trend for a product."""
+    sku = arguments.get("sku")
+
+    # Get product
+    product = (await db.scalars(select(Product).where(Product.asin == sku))).first()
+    if not product:
+        raise ValueError(f"Product not found: {sku}")
+
+    # Placeholder trend analysis
+    # In production, analyze order history
+    return {
+        "sku": sku,
+        "title": product.title,
+        "trend_direction": "increasing",  # increasing, decreasing, stable
+        "trend_strength": 0.75,  # 0-1 scale
+        "growth_rate": 15.5,  # percentage
+        "analysis_period": "90 days",
+        "confidence": "high"
+    }
+
+
+async def _load_stock_levels(db: AsyncSession, sku_list: List[str]) -> Dict[str, Any]:
+    """(asin, title, stock_level) rows for the requested SKUs, keyed by ASIN."""
+    # One query for every product instead of a lookup per SKU, reading
+    # only the columns used below (stock level = quantity available).
+    # = ANY($1) binds the whole list as one array, so the SQL text is the
+    # same for every batch size and asyncpg reuses its prepared statement
+    rows = await db.execute(
+        select(
+            Product.asin,
+            Product.title,
+            Product.quantity_available.label("stock_level"),
+        ).where(Product.asin == any_(bindparam("asins", sku_list, type_=ARRAY(String))))
+    )
+    return {row.asin: row for row in rows}
+
+
+def _stockout_record(sku: str, product, daily_demand: float, days_until_stockout: float, now: datetime) -> Dict[str, Any]:
+    """Prediction entry returned for one SKU."""
+    return {
+        "sku": sku,
+        "title": product.title,
+        "current_stock": product.stock_level,
+        "daily_demand": daily_demand,
+        "days_until_stockout": round(days_until_stockout, 1),
+        "stockout_date": (now + timedelta(days=days_until_stockout)).date().isoformat(),
+        "critical": days_until_stockout < 7
+    }
+
+
+def _stockout_prediction(sku: str, product, forecast: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+    """Stockout estimate for one SKU, or None when the product is unknown."""
+    if not (forecast and product):
+        return None
+
+    # Simple stockout calculation
+    daily_demand = forecast["predicted_daily_demand"]
+    days_until_stockout = product.stock_level / daily_demand if daily_demand > 0 else 999
+
+    return _stockout_record(sku, product, daily_demand, days_until_stockout, now)
+
+
+async def _predict_stockouts_batch(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Days until stockout for each requested product."""
+    sku_list = arguments.get("sku_list", [])
+
+    by_asin = await _load_stock_levels(db, sku_list)
+    # Forecasts are already concurrent cache lookups; fetch each SKU once
+    # so repeated SKUs don't race on the same cache miss
+    unique_skus = list(dict.fromkeys(sku_list))
+    forecasts = await asyncio.gather(
+        *(cached_forecast(sku=sku, days=7) for sku in unique_skus),
+        return_exceptions=True
+    )
+    forecast_by_sku = dict(zip(unique_skus, forecasts))
+
+    # A failed forecast becomes an error entry for its SKU, as in /mcp/stream;
+    # known products keep their slot and are filled in after the vector math
+    predictions: List[Optional[Dict[str, Any]]] = []
+    known = []
+    for sku in sku_list:
+        forecast = forecast_by_sku[sku]
+        if isinstance(forecast, Exception):
+            logger.warning(f"Could not predict stockout for {sku}: {forecast}")
+            predictions.append({"sku": sku, "error": str(forecast)})
+        elif sku in by_asin:
+            known.append((len(predictions), sku, by_asin[sku], forecast["predicted_daily_demand"]))
+            predictions.append(None)
+
+    # Stockout math for the whole batch at once; zero demand never stocks
+    # out and keeps the 999-day sentinel
+    stocks = np.fromiter((product.stock_level for _, _, product, _ in known), dtype=np.float64, count=len(known))
+    demands = np.fromiter((demand for _, _, _, demand in known), dtype=np.float64, count=len(known))
+    days_until_stockout = np.divide(stocks, demands, out=np.full(len(known), 999.0), where=demands > 0)
+
+    for (slot, sku, product, daily_demand), days in zip(known, days_until_stockout.tolist()):
+        predictions[slot] = _stockout_record(sku, product, daily_demand, days, now)
+
+    return {
+        "total_products": len(sku_list),
+        "successful_predictions": len(known),
+        "critical_products": int(np.count_nonzero(days_until_stockout < 7)),
+        "predictions": predictions
+    }
+
+
+TOOL_HANDLERS = {
+    "forecast_demand": _forecast_demand,
+    "analyze_seasonality": _analyze_seasonality,
+    "get_weather_forecast": _get_weather_forecast,
+    "get_local_events": _get_local_events,
+    "detect_trends": _detect_trends,
+    "predict_stockouts_batch": _predict_stockouts_batch,
+}
+
+
+async def execute_tool(tool_name: str, arguments: Dict[str, Any], db: AsyncSession) -> Dict[str, Any]:
+    """Execute a tool and return the result."""
+    handler = TOOL_HANDLERS.get(tool_name)
+    if handler is None:
         raise ValueError(f"Unknown tool: {tool_name}")
 
+    return await handler(arguments, db, datetime.now())
+
 
 # ============================================================================
 # Health Check
@@ -416,7 +589,7 @@ async def health_check():
         "service": "analytics-forecast-mcp",
         "tools_count": len(ANALYTICS_TOOLS),
         "model_loaded": forecaster.is_loaded,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now()
     }
 
 
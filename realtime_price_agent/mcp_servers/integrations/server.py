@@ -16,29 +16,57 @@ Endpoint: /mcp
 
 import os
 import sys
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-import requests
+from typing import Optional, List, Dict, Any, Tuple
+import httpx
+import orjson
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import String, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../.."))
 
-from database.config import get_db
+from database.config import get_async_db
 from database.models import Product, PurchaseOrder
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Amazon API endpoint
+AMAZON_API_URL = "https://amazon-api-app.purplepebble-8d2a2163.eastus.azurecontainerapps.io/products"
+
+# Keep-alive pool shared by Amazon price lookups (closed in lifespan cleanup);
+# HTTP/2 multiplexes the concurrent lookups over one TLS connection
+amazon_client = httpx.AsyncClient(
+    base_url=AMAZON_API_URL,
+    http2=True,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    timeout=5,
+)
+AMAZON_CONCURRENCY = 20  # Price lookups in flight at once (no batch endpoint upstream)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await amazon_client.aclose()
+
+
 app = FastAPI(
     title="Integrations MCP Server",
     description="MCP tools for external system integrations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -49,9 +77,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Amazon API endpoint
-AMAZON_API_URL = "https://amazon-api-app.purplepebble-8d2a2163.eastus.azurecontainerapps.io/products"
-
 
 # ============================================================================
 # MCP Protocol Models
@@ -81,6 +106,32 @@ class MCPCallToolResponse(BaseModel):
     isError: bool = False
 
 
+# MCPRequest still documents the /mcp body in OpenAPI, but the envelope is
+# read straight off the raw JSON instead of being validated into a model
+MCP_REQUEST_OPENAPI = {
+    "requestBody": {
+        "content": {"application/json": {"schema": MCPRequest.model_json_schema()}},
+        "required": True,
+    }
+}
+
+
+async def read_mcp_request(request: Request) -> Tuple[str, Dict[str, Any]]:
+    """(method, params) from the MCP request body."""
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=422, detail="Request body must be JSON")
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("method"), str):
+        raise HTTPException(status_code=422, detail="MCP request needs a string 'method'")
+    params = payload.get("params") or {}
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=422, detail="MCP 'params' must be an object")
+
+    return payload["method"], params
+
+
 # ============================================================================
 # Tool Definitions
 # ============================================================================
@@ -184,23 +235,27 @@ INTEGRATION_TOOLS = [
     }
 ]
 
+# tools/list is static, so its response body is encoded once at import;
+# the definitions are trusted constants and skip validation
+TOOLS_LIST_RESPONSE = MCPListToolsResponse.model_construct(
+    tools=[MCPToolDefinition.model_construct(**tool) for tool in INTEGRATION_TOOLS]
+)
+TOOLS_LIST_BODY = orjson.dumps(TOOLS_LIST_RESPONSE.model_dump())
+
 
 # ============================================================================
 # MCP Endpoints
 # ============================================================================
 
-@app.post("/mcp")
-async def mcp_endpoint(request: MCPRequest, db: Session = Depends(get_db)):
+@app.post("/mcp", openapi_extra=MCP_REQUEST_OPENAPI)
+async def mcp_endpoint(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Main MCP protocol endpoint."""
-    method = request.method
-    params = request.params or {}
+    method, params = await read_mcp_request(request)
 
     logger.info(f"MCP request: method={method}, params={params}")
 
     if method == "tools/list":
-        return MCPListToolsResponse(
-            tools=[MCPToolDefinition(**tool) for tool in INTEGRATION_TOOLS]
-        )
+        return Response(content=TOOLS_LIST_BODY, media_type="application/json")
 
     elif method == "tools/call":
         tool_name = params.get("name")
@@ -211,7 +266,7 @@ async def mcp_endpoint(request: MCPRequest, db: Session = Depends(get_db)):
             return MCPCallToolResponse(
                 content=[{
                     "type": "text",
-                    "text": str(result)
+                    "text": orjson.dumps(result, default=str).decode()
                 }],
                 isError=False
             )
@@ -233,137 +288,177 @@ async def mcp_endpoint(request: MCPRequest, db: Session = Depends(get_db)):
 # Tool Implementations
 # ============================================================================
 
-async def execute_tool(tool_name: str, arguments: Dict[str, Any], db: Session) -> Dict[str, Any]:
-    """Execute a tool and return the result."""
+async def _send_purchase_order_edi(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Transmit a purchase order over EDI."""
+    supplier = arguments.get("supplier")
+    order_data = arguments.get("order_data")
 
-    if tool_name == "send_purchase_order_edi":
-        supplier = arguments.get("supplier")
-        order_data = arguments.get("order_data")
-
-        # Placeholder EDI transmission
-        # In production, integrate with EDI provider (Ariba, Coupa, etc.)
-        logger.info(f"Sending EDI purchase order to {supplier}: {order_data}")
-
-        return {
-            "success": True,
-            "method": "EDI",
-            "supplier": supplier,
-            "order_id": order_data.get("order_id"),
-            "transmission_id": f"EDI-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            "status": "transmitted",
-            "timestamp": datetime.now().isoformat()
-        }
+    # Placeholder EDI transmission
+    # In production, integrate with EDI provider (Ariba, Coupa, etc.)
+    logger.info(f"Sending EDI purchase order to {supplier}: {order_data}")
 
-    elif tool_name == "send_purchase_order_api":
-        supplier = arguments.get("supplier")
-        order_data = arguments.get("order_data")
-
-        # Placeholder API call
-        # In production, call actual supplier API
-        logger.info(f"Sending API purchase order to {supplier}: {order_data}")
-
-        return {
-            "success": True,
-            "method": "API",
-            "supplier": supplier,
-            "order_id": order_data.get("order_id"),
-            "api_response": {
-                "confirmation_number": f"API-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                "status": "accepted"
-            },
-            "timestamp": datetime.now().isoformat()
-        }
+    return {
+        "success": True,
+        "method": "EDI",
+        "supplier": supplier,
+        "order_id": order_data.get("order_id"),
+        "transmission_id": f"EDI-{now:%Y%m%d%H%M%S}",
+        "status": "transmitted",
+        "timestamp": now.isoformat()
+    }
 
-    elif tool_name == "send_purchase_order_email":
-        supplier = arguments.get("supplier")
-        order_data = arguments.get("order_data")
-
-        # Placeholder email send
-        # In production, integrate with email service (SendGrid, SES, etc.)
-        logger.info(f"Sending email purchase order to {supplier}: {order_data}")
-
-        return {
-            "success": True,
-            "method": "EMAIL",
-            "supplier": supplier,
-            "order_id": order_data.get("order_id"),
-            "email_sent": True,
-            "recipient": f"orders@{supplier}.com",
-            "message_id": f"EMAIL-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            "timestamp": datetime.now().isoformat()
-        }
 
-    elif tool_name == "send_email":
-        to = arguments.get("to")
-        subject = arguments.get("subject")
-        body = arguments.get("body")
+async def _send_purchase_order_api(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Submit a purchase order to the supplier API."""
+    supplier = arguments.get("supplier")
+    order_data = arguments.get("order_data")
 
-        # Placeholder email send
-        logger.info(f"Sending email to {to}: {subject}")
+    # Placeholder API call
+    # In production, call actual supplier API
+    logger.info(f"Sending API purchase order to {supplier}: {order_data}")
 
-        return {
-            "success": True,
-            "recipient": to,
-            "subject": subject,
-            "message_id": f"MSG-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            "timestamp": datetime.now().isoformat()
-        }
+    return {
+        "success": True,
+        "method": "API",
+        "supplier": supplier,
+        "order_id": order_data.get("order_id"),
+        "api_response": {
+            "confirmation_number": f"API-{now:%Y%m%d%H%M%S}",
+            "status": "accepted"
+        },
+        "timestamp": now.isoformat()
+    }
 
-    elif tool_name == "sync_amazon_prices":
-        sku_list = arguments.get("sku_list", None)
-
-        # Get products to sync
-        if sku_list:
-            products = db.query(Product).filter(Product.asin.in_(sku_list)).all()
-        else:
-            products = db.query(Product).filter(Product.is_active == True).limit(50).all()
-
-        synced_count = 0
-        updated_count = 0
-        errors = []
-
-        for product in products:
-            try:
-                # Fetch price from Amazon API
-                response = requests.get(f"{AMAZON_API_URL}/{product.asin}", timeout=5)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    new_price = data.get("price")
-
-                    if new_price and new_price != product.price:
-                        old_price = product.price
-                        product.price = new_price
-                        product.last_updated = datetime.now()
-                        updated_count += 1
-
-                        logger.info(f"Updated price for {product.asin}: ${old_price} -> ${new_price}")
-
-                    synced_count += 1
-
-            except Exception as e:
-                logger.error(f"Error syncing {product.asin}: {e}")
-                errors.append({
-                    "sku": product.asin,
-                    "error": str(e)
-                })
-
-        # Commit changes
-        if updated_count > 0:
-            db.commit()
-
-        return {
-            "total_products": len(products),
-            "synced_successfully": synced_count,
-            "prices_updated": updated_count,
-            "errors": len(errors),
-            "error_details": errors[:10],  # First 10 errors
-            "timestamp": datetime.now().isoformat()
-        }
 
+async def _send_purchase_order_email(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Email a purchase order to the supplier."""
+    supplier = arguments.get("supplier")
+    order_data = arguments.get("order_data")
+
+    # Placeholder email send
+    # In production, integrate with email service (SendGrid, SES, etc.)
+    logger.info(f"Sending email purchase order to {supplier}: {order_data}")
+
+    return {
+        "success": True,
+        "method": "EMAIL",
+        "supplier": supplier,
+        "order_id": order_data.get("order_id"),
+        "email_sent": True,
+        "recipient": f"orders@{supplier}.com",
+        "message_id": f"EMAIL-{now:%Y%m%d%H%M%S}",
+        "timestamp": now.isoformat()
+    }
+
+
+async def _send_email(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Send a notification email."""
+    to = arguments.get("to")
+    subject = arguments.get("subject")
+    body = arguments.get("body")
+
+    # Placeholder email send
+    logger.info(f"Sending email to {to}: {subject}")
+
+    return {
+        "success": True,
+        "recipient": to,
+        "subject": subject,
+        "message_id": f"MSG-{now:%Y%m%d%H%M%S}",
+        "timestamp": now.isoformat()
+    }
+
+
+async def _sync_amazon_prices(arguments: Dict[str, Any], db: AsyncSession, now: datetime) -> Dict[str, Any]:
+    """Refresh market prices from the Amazon API."""
+    sku_list = arguments.get("sku_list", None)
+
+    # Get products to sync
+    if sku_list:
+        # One array bind (= ANY) keeps the statement text, and asyncpg's
+        # prepared statement, the same whatever the list length
+        stmt = select(Product).where(Product.asin == any_(bindparam("asins", sku_list, type_=ARRAY(String))))
     else:
+        stmt = select(Product).where(Product.is_active == True).limit(50)
+    products = (await db.scalars(stmt)).all()
+
+    synced_count = 0
+    updates = []
+    errors = []
+
+    # The Amazon API only serves /products/{asin}, so lookups run
+    # concurrently over the shared pool, AMAZON_CONCURRENCY at a time
+    semaphore = asyncio.Semaphore(AMAZON_CONCURRENCY)
+
+    async def _fetch(asin: str) -> httpx.Response:
+        async with semaphore:
+            return await amazon_client.get(f"/{asin}")
+
+    responses = await asyncio.gather(
+        *(_fetch(product.asin) for product in products),
+        return_exceptions=True
+    )
+
+    for product, response in zip(products, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+
+            if response.status_code == 200:
+                data = response.json()
+                new_price = data.get("price")
+                old_price = float(product.market_price) if product.market_price is not None else None
+
+                if new_price and new_price != old_price:
+                    updates.append({
+                        "asin": product.asin,
+                        "market_price": new_price,
+                        "price_last_updated": now
+                    })
+
+                    logger.info(f"Updated price for {product.asin}: ${old_price} -> ${new_price}")
+
+                synced_count += 1
+
+        except Exception as e:
+            logger.error(f"Error syncing {product.asin}: {e}")
+            errors.append({
+                "sku": product.asin,
+                "error": str(e)
+            })
+
+    # One executemany UPDATE keyed on the primary key, not a flush per row
+    if updates:
+        await db.execute(update(Product), updates)
+        await db.commit()
+
+    return {
+        "total_products": len(products),
+        "synced_successfully": synced_count,
+        "prices_updated": len(updates),
+        "errors": len(errors),
+        "error_details": errors[:10],  # First 10 errors
+        "timestamp": now.isoformat()
+    }
+
+
+TOOL_HANDLERS = {
+    "send_purchase_order_edi": _send_purchase_order_edi,
+    "send_purchase_order_api": _send_purchase_order_api,
+    "send_purchase_order_email": _send_purchase_order_email,
+    "send_email": _send_email,
+    "sync_amazon_prices": _sync_amazon_prices,
+}
+
+
+async def execute_tool(tool_name: str, arguments: Dict[str, Any], db: AsyncSession) -> Dict[str, Any]:
+    """Execute a tool and return the result."""
+    handler = TOOL_HANDLERS.get(tool_name)
+    if handler is None:
         raise ValueError(f"Unknown tool: {tool_name}")
 
+    return await handler(arguments, db, datetime.now())
+
 
 # ============================================================================
 # Health Check
@@ -377,7 +472,7 @@ async def health_check():
         "service": "integrations-mcp",
         "tools_count": len(INTEGRATION_TOOLS),
         "amazon_api_url": AMAZON_API_URL,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now()
     }
 
 
@@ -381,7 +381,7 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], db: Session) -
 
     elif tool_name == "get_low_stock_products":
         limit = arguments.get("limit", 50)
-        low_stock = inventory_service.get_low_stock_products(limit=limit)
+        low_stock = list(inventory_service.get_low_stock_products(limit=limit))
 
         return {
             "count": len(low_stock),
@@ -10,6 +10,16 @@ from .negotiation import (
     CreateSessionRequest,
     RequestQuotesRequest,
 )
+from .inventory import (
+    ProductOut,
+    ProductDetailOut,
+    LowStockProductOut,
+    SupplierOut,
+    SupplierProductOut,
+    SupplierDetailOut,
+    SupplierWithProductsOut,
+    OrderOut,
+)
 
 __all__ = [
     "NegotiationStatus",
@@ -20,4 +30,12 @@ __all__ = [
     "AcceptOfferRequest",
     "CreateSessionRequest",
     "RequestQuotesRequest",
+    "ProductOut",
+    "ProductDetailOut",
+    "LowStockProductOut",
+    "SupplierOut",
+    "SupplierProductOut",
+    "SupplierDetailOut",
+    "SupplierWithProductsOut",
+    "OrderOut",
 ]
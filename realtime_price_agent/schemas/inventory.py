@@ -0,0 +1,119 @@
+"""
+Pydantic response models for inventory, supplier and order endpoints.
+
+Built with from_attributes so endpoints can return ORM objects or row
+mappings directly; DECIMAL columns are coerced to float by pydantic-core.
+"""
+
+from pydantic import AliasPath, BaseModel, ConfigDict, Field, computed_field
+from typing import List, Optional
+from datetime import datetime
+
+
+class ProductOut(BaseModel):
+    """Product row in listings."""
+    model_config = ConfigDict(from_attributes=True)
+
+    asin: str
+    title: str
+    brand: Optional[str] = None
+    description: Optional[str] = None
+    unit_cost: Optional[float] = None
+    market_price: Optional[float] = None
+    quantity_on_hand: int
+    quantity_reserved: int
+    quantity_available: int
+    reorder_point: int
+    supplier_id: Optional[str] = None
+
+
+class ProductDetailOut(ProductOut):
+    """Single product with reorder rules and supplier name."""
+
+    last_purchase_price: Optional[float] = None
+    reorder_quantity: int
+    lead_time_days: int
+    supplier_name: Optional[str] = Field(
+        default=None, validation_alias=AliasPath("supplier", "supplier_name")
+    )
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    is_active: Optional[bool] = None
+
+
+class LowStockProductOut(BaseModel):
+    """Product that has reached its reorder point."""
+    model_config = ConfigDict(from_attributes=True)
+
+    asin: str
+    title: str
+    brand: Optional[str] = None
+    quantity_available: int
+    reorder_point: int
+    supplier_id: Optional[str] = None
+
+
+class SupplierOut(BaseModel):
+    """Supplier row in listings."""
+    model_config = ConfigDict(from_attributes=True)
+
+    supplier_id: str
+    supplier_name: str
+    contact_person: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
+    payment_terms: Optional[str] = None
+    on_time_delivery_rate: Optional[float] = None
+    quality_rating: Optional[float] = None
+    is_active: Optional[bool] = None
+
+
+class SupplierProductOut(BaseModel):
+    """Stock snapshot of a supplier's product."""
+    model_config = ConfigDict(from_attributes=True)
+
+    asin: str
+    title: str
+    brand: Optional[str] = None
+    quantity_on_hand: int
+    quantity_available: int
+
+
+class SupplierDetailOut(SupplierOut):
+    """Supplier with address and terms."""
+
+    address: Optional[str] = None
+    state_province: Optional[str] = None
+    postal_code: Optional[str] = None
+    default_lead_time_days: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class SupplierWithProductsOut(SupplierDetailOut):
+    """Supplier detail plus its active products."""
+
+    products: List[SupplierProductOut] = []
+
+    @computed_field
+    @property
+    def product_count(self) -> int:
+        return len(self.products)
+
+
+class OrderOut(BaseModel):
+    """Purchase order row in listings."""
+    model_config = ConfigDict(from_attributes=True)
+
+    po_number: str
+    supplier_id: Optional[str] = None
+    supplier_name: Optional[str] = None
+    order_date: datetime
+    expected_delivery_date: Optional[datetime] = None
+    actual_delivery_date: Optional[datetime] = None
+    total_cost: Optional[float] = None
+    status: str
+    item_count: int
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
@@ -0,0 +1,138 @@
+"""
+Pending human-in-the-loop approvals, shared across uvicorn workers.
+
+Each approval is a Redis hash ({namespace}:{id}) that expires after 24h,
+indexed by creation time in a sorted set ({namespace}:index) so listings
+come back newest first without sorting in Python. Uses the response
+cache's Redis connection; without Redis, approvals are kept in-process
+(single worker only).
+
+Usage:
+    from services.approval_store import order_approvals
+
+    await order_approvals.put(workflow_id, {...})
+    data = await order_approvals.get(workflow_id)
+    await order_approvals.delete(workflow_id)
+    data = await order_approvals.pop(workflow_id)  # claim it exactly once
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from services.cache import response_cache
+
+APPROVAL_TTL_SECONDS = 24 * 3600
+
+
+class ApprovalStore:
+    """Approval payloads keyed by id, listed newest first"""
+
+    def __init__(self, namespace: str, ttl: int = APPROVAL_TTL_SECONDS):
+        self.namespace = namespace
+        self.ttl = ttl
+        # id -> (expires_at, created_at, data)
+        self._local: Dict[str, Tuple[float, float, Dict[str, Any]]] = {}
+
+    def _key(self, approval_id: str) -> str:
+        return f"{self.namespace}:{approval_id}"
+
+    @property
+    def _index(self) -> str:
+        return f"{self.namespace}:index"
+
+    async def put(self, approval_id: str, data: Dict[str, Any]):
+        """Add (or replace) a pending approval"""
+        created_at = time.time()
+
+        redis = response_cache.redis
+        if redis is not None:
+            key = self._key(approval_id)
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={
+                    "data": orjson.dumps(data, default=str),
+                    "created_at": created_at,
+                })
+                pipe.expire(key, self.ttl)
+                pipe.zadd(self._index, {approval_id: created_at})
+                await pipe.execute()
+            return
+
+        self._local[approval_id] = (time.monotonic() + self.ttl, created_at, data)
+
+    async def get(self, approval_id: str) -> Optional[Dict[str, Any]]:
+        """Return the approval payload, or None if unknown or expired"""
+        redis = response_cache.redis
+        if redis is not None:
+            raw = await redis.hget(self._key(approval_id), "data")
+            return orjson.loads(raw) if raw is not None else None
+
+        entry = self._local.get(approval_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._local[approval_id]
+            return None
+        return entry[2]
+
+    async def delete(self, approval_id: str) -> bool:
+        """Remove an approval; returns False if it was already gone"""
+        redis = response_cache.redis
+        if redis is not None:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(approval_id))
+                pipe.zrem(self._index, approval_id)
+                deleted, _ = await pipe.execute()
+            return deleted == 1
+
+        return self._local.pop(approval_id, None) is not None
+
+    async def pop(self, approval_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and return an approval; only one caller (across workers) gets it"""
+        redis = response_cache.redis
+        if redis is not None:
+            key = self._key(approval_id)
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hget(key, "data")
+                pipe.delete(key)
+                pipe.zrem(self._index, approval_id)
+                raw, _, _ = await pipe.execute()
+            return orjson.loads(raw) if raw is not None else None
+
+        entry = self._local.pop(approval_id, None)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[2]
+
+    async def list(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """All pending approvals as (id, data), newest first"""
+        redis = response_cache.redis
+        if redis is not None:
+            # Hashes expire on their own; trim their index entries to match
+            await redis.zremrangebyscore(self._index, "-inf", time.time() - self.ttl)
+            ids = await redis.zrevrange(self._index, 0, -1)
+            if not ids:
+                return []
+
+            async with redis.pipeline(transaction=False) as pipe:
+                for approval_id in ids:
+                    pipe.hget(self._key(approval_id), "data")
+                raws = await pipe.execute()
+
+            return [
+                (approval_id, orjson.loads(raw))
+                for approval_id, raw in zip(ids, raws)
+                if raw is not None
+            ]
+
+        now = time.monotonic()
+        for approval_id in [k for k, v in self._local.items() if v[0] < now]:
+            del self._local[approval_id]
+
+        entries = sorted(self._local.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [(approval_id, entry[2]) for approval_id, entry in entries]
+
+
+order_approvals = ApprovalStore("approval")
+negotiation_approvals = ApprovalStore("negotiation_approval")
@@ -0,0 +1,112 @@
+"""
+Negotiation audit trail, indexed by session.
+
+Each session's entries go to a capped Redis stream (audit:{session_id})
+when the response cache is connected to Redis, so they are shared across
+uvicorn workers and survive restarts. Without Redis they are kept in a
+bounded in-process deque per session, for at most MAX_LOCAL_SESSIONS
+recently used sessions.
+
+Usage:
+    from services.audit_log import audit_log
+
+    await audit_log.append("negotiation_started", session_id, {...})
+    await audit_log.append_many(session_id, [audit_log.entry(...), ...])
+    entries = await audit_log.get_session(session_id)
+"""
+
+import json
+import logging
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, List
+
+from services.cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES_PER_SESSION = 1000
+MAX_LOCAL_SESSIONS = 1000  # Least recently used sessions are evicted past this
+RETENTION_SECONDS = 30 * 24 * 3600  # Drop a session's trail 30 days after its last entry
+
+
+class AuditLog:
+    """Append-only audit entries, read back per session"""
+
+    def __init__(self):
+        # session_id -> entries, least recently used session first
+        self._local: "OrderedDict[str, Deque[dict]]" = OrderedDict()
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"audit:{session_id}"
+
+    @staticmethod
+    def entry(action: str, session_id: str, details: dict) -> dict:
+        """Build an audit entry, timestamped now (for append_many)"""
+        return {
+            "id": f"AUD-{uuid.uuid4().hex[:8]}",
+            "action": action,
+            "session_id": session_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "details": details
+        }
+
+    async def append(self, action: str, session_id: str, details: dict) -> dict:
+        """Record an audit entry for a session"""
+        entry = self.entry(action, session_id, details)
+        await self.append_many(session_id, [entry])
+        return entry
+
+    async def append_many(self, session_id: str, entries: List[dict]):
+        """Record several entries for a session in one round trip"""
+        if not entries:
+            return
+
+        redis = response_cache.redis
+        if redis is not None:
+            key = self._key(session_id)
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for entry in entries:
+                        pipe.xadd(
+                            key,
+                            {"entry": json.dumps(entry, default=str)},
+                            maxlen=MAX_ENTRIES_PER_SESSION,
+                            approximate=True,
+                        )
+                    pipe.expire(key, RETENTION_SECONDS)
+                    await pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Audit stream write failed for {session_id}: {e}")
+
+        # No Redis (or it failed): keep the entries in this process
+        local = self._local.get(session_id)
+        if local is None:
+            local = self._local[session_id] = deque(maxlen=MAX_ENTRIES_PER_SESSION)
+            while len(self._local) > MAX_LOCAL_SESSIONS:
+                self._local.popitem(last=False)
+        else:
+            self._local.move_to_end(session_id)
+        local.extend(entries)
+
+    async def get_session(self, session_id: str) -> List[dict]:
+        """Audit entries for a session, oldest first"""
+        entries = []
+
+        redis = response_cache.redis
+        if redis is not None:
+            stream = await redis.xrange(self._key(session_id), "-", "+")
+            entries = [json.loads(fields["entry"]) for _, fields in stream]
+
+        local = self._local.get(session_id)
+        if local:
+            self._local.move_to_end(session_id)
+            entries.extend(local)
+
+        return entries
+
+
+audit_log = AuditLog()
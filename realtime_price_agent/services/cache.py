@@ -0,0 +1,168 @@
+"""
+Response cache for read-heavy, tolerably stale endpoints.
+
+Backed by Redis when REDIS_URL is set (shared across uvicorn workers),
+otherwise by a size-capped in-process TTL/LRU dict so local runs need no
+extra services.
+
+Usage:
+    from services.cache import response_cache, cached
+
+    @app.get("/inventory/summary")
+    @cached(ttl=30, key=lambda **_: "inventory:summary")
+    async def get_inventory_summary(...):
+        ...
+
+    await response_cache.delete("inventory:summary")
+    await response_cache.delete_prefix("workflow:stock_rows:")
+"""
+
+import functools
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_LOCAL_ENTRIES = 10_000  # Least recently used keys are evicted past this
+SWEEP_INTERVAL = 60  # Seconds between sweeps of expired in-process entries
+
+
+class ResponseCache:
+    """JSON value cache with per-key TTL"""
+
+    def __init__(self):
+        self.redis = None
+        # key -> (expires_at, value), least recently used first
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._next_sweep = 0.0
+
+    async def connect(self, url: Optional[str] = None):
+        """Connect to Redis if configured; falls back to in-process storage"""
+        url = url or os.getenv("REDIS_URL")
+        if not url:
+            logger.info("REDIS_URL not set - using in-process response cache")
+            return
+
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning(
+                "REDIS_URL is set but redis is not installed (the 'cache' extra) "
+                "- using in-process response cache"
+            )
+            return
+
+        client = redis.from_url(url, decode_responses=True)
+        try:
+            await client.ping()
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}) - using in-process response cache")
+            await client.aclose()
+            return
+        self.redis = client
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss"""
+        if self.redis is not None:
+            raw = await self.redis.get(key)
+            return json.loads(raw) if raw is not None else None
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        """Store a JSON-serializable value for ttl seconds"""
+        if self.redis is not None:
+            await self.redis.set(key, json.dumps(value, default=str), ex=ttl)
+            return
+
+        now = time.monotonic()
+        self._local[key] = (now + ttl, value)
+        self._local.move_to_end(key)
+
+        if now >= self._next_sweep:
+            # Keys are never read again once expired, so drop them here
+            for stale in [k for k, (expires_at, _) in self._local.items() if expires_at < now]:
+                del self._local[stale]
+            self._next_sweep = now + SWEEP_INTERVAL
+
+        while len(self._local) > MAX_LOCAL_ENTRIES:
+            self._local.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        """Invalidate keys"""
+        if not keys:
+            return
+        if self.redis is not None:
+            try:
+                await self.redis.delete(*keys)
+            except Exception as e:
+                logger.warning(f"Cache invalidation failed for {keys}: {e}")
+            return
+
+        for key in keys:
+            self._local.pop(key, None)
+
+    async def delete_prefix(self, prefix: str):
+        """Invalidate every key starting with prefix"""
+        if self.redis is not None:
+            try:
+                keys = [key async for key in self.redis.scan_iter(match=f"{prefix}*")]
+                if keys:
+                    await self.redis.delete(*keys)
+            except Exception as e:
+                logger.warning(f"Cache invalidation failed for {prefix}*: {e}")
+            return
+
+        for key in [key for key in self._local if key.startswith(prefix)]:
+            del self._local[key]
+
+
+response_cache = ResponseCache()
+
+
+def cached(ttl: int, key: Callable[..., str]):
+    """
+    Cache an async endpoint's JSON result.
+
+    Args:
+        ttl: Seconds to keep the result
+        key: Builds the cache key from the endpoint's keyword arguments
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(**kwargs)
+            try:
+                hit = await response_cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Cache read failed for {cache_key}: {e}")
+                hit = None
+            if hit is not None:
+                return hit
+
+            result = await func(*args, **kwargs)
+
+            try:
+                await response_cache.set(cache_key, result, ttl)
+            except Exception as e:
+                logger.warning(f"Cache write failed for {cache_key}: {e}")
+            return result
+        return wrapper
+    return decorator
@@ -1,10 +1,11 @@
 """
 Inventory service for product CRUD and stock operations.
 """
-from typing import List, Optional, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from database.models import Product
+from typing import Iterable, List, Optional, Dict
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import or_, and_, select, func, update, case, cast, Float, Select
+from sqlalchemy.engine import Row, RowMapping
+from database.models import Product, Supplier
 
 
 class InventoryService:
@@ -34,49 +35,189 @@ class InventoryService:
         Returns:
             List of Product objects
         """
-        q = self.db.query(Product).filter(Product.is_active == True)
+        q = self.db.query(Product).filter(*self._product_filters(brand, query, min_qty))
+
+        return q.offset(skip).limit(limit).all()
+
+    def get_product_rows(
+        self,
+        brand: Optional[str] = None,
+        query: Optional[str] = None,
+        min_qty: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> List[RowMapping]:
+        """
+        Same filtering as get_products, but returns plain column mappings
+        for read-only listings (no ORM instances or identity map).
+        Prices are cast to float in SQL so rows serialize directly.
+
+        Rows are ordered by ASIN; pass the last ASIN of the previous page
+        as `after` for keyset pagination instead of a growing `skip`.
+        """
+        stmt = self.product_rows_query(brand, query, min_qty, skip, limit, after)
+
+        return self.db.execute(stmt).mappings().all()
+
+    @classmethod
+    def product_rows_query(
+        cls,
+        brand: Optional[str] = None,
+        query: Optional[str] = None,
+        min_qty: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> Select:
+        """Statement behind get_product_rows (also executed by async endpoints)"""
+        stmt = cls.product_export_query(brand, query, min_qty)
+
+        if after is not None:
+            stmt = stmt.where(Product.asin > after)
+
+        return stmt.offset(skip).limit(limit)
+
+    @classmethod
+    def product_export_query(
+        cls,
+        brand: Optional[str] = None,
+        query: Optional[str] = None,
+        min_qty: Optional[int] = None
+    ) -> Select:
+        """Listing columns for every matching product, ordered by ASIN (unpaged)"""
+        return (
+            select(
+                Product.asin,
+                Product.title,
+                Product.brand,
+                Product.description,
+                cast(Product.unit_cost, Float).label('unit_cost'),
+                cast(Product.market_price, Float).label('market_price'),
+                Product.quantity_on_hand,
+                Product.quantity_reserved,
+                Product.quantity_available.label('quantity_available'),
+                Product.reorder_point,
+                Product.supplier_id,
+            )
+            .where(*cls._product_filters(brand, query, min_qty))
+            .order_by(Product.asin)
+        )
+
+    @staticmethod
+    def _product_filters(
+        brand: Optional[str],
+        query: Optional[str],
+        min_qty: Optional[int]
+    ) -> List:
+        """WHERE conditions shared by the product listing queries"""
+        filters = [Product.is_active == True]
 
         if brand:
-            q = q.filter(Product.brand.ilike(f'%{brand}%'))
+            filters.append(Product.brand.ilike(f'%{brand}%'))
 
         if query:
-            q = q.filter(
+            filters.append(
                 or_(
                     Product.title.ilike(f'%{query}%'),
                     Product.description.ilike(f'%{query}%')
                 )
             )
 
-        # Note: quantity_available is computed, so we calculate it in query
+        # quantity_available is an indexed computed column
         if min_qty is not None:
-            q = q.filter((Product.quantity_on_hand - Product.quantity_reserved) >= min_qty)
+            filters.append(Product.quantity_available >= min_qty)
 
-        return q.offset(skip).limit(limit).all()
+        return filters
 
     def get_product_by_asin(self, asin: str) -> Optional[Product]:
         """Get single product by ASIN"""
         return self.db.query(Product).filter(Product.asin == asin).first()
 
-    def get_low_stock_products(self, threshold: Optional[int] = None) -> List[Product]:
+    @staticmethod
+    def product_detail_query(asin: str) -> Select:
+        """Single product with its supplier joined in"""
+        return select(Product).options(joinedload(Product.supplier)).where(Product.asin == asin)
+
+    @staticmethod
+    def product_version_query(asin: str) -> Select:
+        """Cheap probe of what product_detail_query returns, for ETags"""
+        return select(
+            Product.updated_at,
+            Supplier.updated_at.label('supplier_updated_at'),
+        ).outerjoin(
+            Supplier, Product.supplier_id == Supplier.supplier_id
+        ).where(Product.asin == asin)
+
+    def get_low_stock_products(
+        self,
+        threshold: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Iterable[Product]:
         """
         Get products below reorder point.
 
         Args:
             threshold: Optional custom threshold (overrides individual reorder_point)
+            limit: Optional maximum number of products to return
 
         Returns:
-            List of products that need reordering
+            Products that need reordering, streamed from the database in batches
         """
-        q = self.db.query(Product).filter(Product.is_active == True)
+        stmt = self.low_stock_query(threshold, limit).execution_options(yield_per=1000)
+
+        return self.db.scalars(stmt)
+
+    def get_stock_rows(
+        self,
+        include_all: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Row]:
+        """
+        (asin, title, unit_cost, quantity_on_hand) tuples for low-stock
+        products, or every active product with include_all. No ORM
+        instances are built; unit_cost is cast to float in SQL.
+        """
+        return self.db.execute(self.stock_rows_query(include_all, limit)).all()
+
+    @classmethod
+    def stock_rows_query(
+        cls,
+        include_all: bool = False,
+        limit: Optional[int] = None
+    ) -> Select:
+        """Statement behind get_stock_rows"""
+        columns = (
+            Product.asin,
+            Product.title,
+            cast(Product.unit_cost, Float).label('unit_cost'),
+            Product.quantity_on_hand,
+        )
+        if not include_all:
+            return cls.low_stock_query(limit=limit).with_only_columns(*columns)
+
+        stmt = select(*columns).where(*cls._product_filters(None, None, None))
+        return stmt.limit(limit) if limit is not None else stmt
+
+    @staticmethod
+    def low_stock_query(
+        threshold: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Select:
+        """Statement behind get_low_stock_products"""
+        stmt = select(Product).where(Product.is_active == True)
 
         if threshold is not None:
             # Use custom threshold for all products
-            q = q.filter((Product.quantity_on_hand - Product.quantity_reserved) <= threshold)
+            stmt = stmt.where(Product.quantity_available <= threshold)
         else:
             # Use each product's reorder_point
-            q = q.filter((Product.quantity_on_hand - Product.quantity_reserved) <= Product.reorder_point)
+            stmt = stmt.where(Product.quantity_available <= Product.reorder_point)
+
+        if limit is not None:
+            stmt = stmt.limit(limit)
 
-        return q.all()
+        return stmt
 
     def adjust_stock(
         self,
@@ -95,18 +236,24 @@ class InventoryService:
         Returns:
             Updated Product object or None if not found
         """
-        product = self.get_product_by_asin(asin)
-        if not product:
-            return None
+        new_quantity = Product.quantity_on_hand + quantity_change
 
-        product.quantity_on_hand += quantity_change
+        # Single UPDATE ... RETURNING; ensure quantity doesn't go negative
+        product = self.db.execute(
+            update(Product)
+            .where(Product.asin == asin)
+            .values(quantity_on_hand=case((new_quantity < 0, 0), else_=new_quantity))
+            .returning(Product)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
 
-        # Ensure quantity doesn't go negative
-        if product.quantity_on_hand < 0:
-            product.quantity_on_hand = 0
+        if not product:
+            self.db.rollback()
+            return None
 
+        # Detach so the commit doesn't expire the freshly returned row
+        self.db.expunge(product)
         self.db.commit()
-        self.db.refresh(product)
 
         return product
 
@@ -121,19 +268,17 @@ class InventoryService:
         Returns:
             True if successful, False if insufficient stock
         """
-        product = self.get_product_by_asin(asin)
-        if not product:
-            return False
-
-        available = product.quantity_on_hand - product.quantity_reserved
-
-        if available < quantity:
-            return False
-
-        product.quantity_reserved += quantity
+        # Availability is checked in the WHERE clause so concurrent
+        # reservations cannot oversell
+        result = self.db.execute(
+            update(Product)
+            .where(Product.asin == asin, Product.quantity_available >= quantity)
+            .values(quantity_reserved=Product.quantity_reserved + quantity)
+            .execution_options(synchronize_session=False)
+        )
         self.db.commit()
 
-        return True
+        return result.rowcount == 1
 
     def release_stock(self, asin: str, quantity: int) -> bool:
         """
@@ -146,35 +291,56 @@ class InventoryService:
         Returns:
             True if successful, False if not found
         """
-        product = self.get_product_by_asin(asin)
-        if not product:
-            return False
-
-        product.quantity_reserved -= quantity
+        new_reserved = Product.quantity_reserved - quantity
 
         # Ensure reserved doesn't go negative
-        if product.quantity_reserved < 0:
-            product.quantity_reserved = 0
-
+        result = self.db.execute(
+            update(Product)
+            .where(Product.asin == asin)
+            .values(quantity_reserved=case((new_reserved < 0, 0), else_=new_reserved))
+            .execution_options(synchronize_session=False)
+        )
         self.db.commit()
 
-        return True
+        return result.rowcount == 1
 
     def get_stock_summary(self) -> Dict:
         """Get summary statistics for inventory"""
-        all_products = self.db.query(Product).filter(Product.is_active == True).all()
-
-        total = len(all_products)
-        out_of_stock = sum(1 for p in all_products if p.quantity_on_hand == 0)
-        low_stock = sum(1 for p in all_products if p.needs_reorder and p.quantity_on_hand > 0)
+        row = self.db.execute(self.stock_summary_query()).one()
+
+        return self.format_stock_summary(row)
+
+    @staticmethod
+    def stock_summary_query() -> Select:
+        """Single aggregate statement behind get_stock_summary"""
+        return select(
+            func.count().label('total'),
+            func.count().filter(Product.quantity_on_hand == 0).label('out_of_stock'),
+            func.count().filter(
+                and_(
+                    Product.quantity_on_hand > 0,
+                    Product.quantity_available <= Product.reorder_point
+                )
+            ).label('low_stock'),
+            func.sum(
+                Product.quantity_on_hand * func.coalesce(Product.unit_cost, 0)
+            ).label('total_value'),
+        ).where(Product.is_active == True)
+
+    @staticmethod
+    def format_stock_summary(row: Row) -> Dict:
+        """Shape the stock_summary_query row for the API"""
+        total = row.total
+        out_of_stock = row.out_of_stock
+        low_stock = row.low_stock
         adequate = total - out_of_stock - low_stock
 
-        total_value = sum(p.quantity_on_hand * (p.unit_cost or 0) for p in all_products)
+        total_value = row.total_value or 0
 
         return {
             'total_products': total,
             'out_of_stock': out_of_stock,
             'low_stock': low_stock,
             'adequate_stock': adequate,
-            'total_inventory_value': round(total_value, 2)
+            'total_inventory_value': round(float(total_value), 2)
         }
@@ -1,11 +1,13 @@
 """
 Order service for purchase order operations.
 """
-from typing import List, Optional, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from typing import List, Optional, Dict, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload, raiseload
+from sqlalchemy import and_, or_, func, select, cast, Float, Select
+from sqlalchemy.engine import Row, RowMapping
 from datetime import datetime, timedelta
-from database.models import PurchaseOrder, PurchaseOrderItem, Product
+from uuid import uuid4
+from database.models import PurchaseOrder, PurchaseOrderItem, Product, Supplier
 
 
 class OrderService:
@@ -37,7 +39,13 @@ class OrderService:
         """
         cutoff_date = datetime.now() - timedelta(days=days)
 
-        q = self.db.query(PurchaseOrder).filter(
+        # Supplier name and items (for item_count) are loaded up front;
+        # anything else raises rather than issuing a query per order
+        q = self.db.query(PurchaseOrder).options(
+            joinedload(PurchaseOrder.supplier).load_only(Supplier.supplier_name),
+            selectinload(PurchaseOrder.items),
+            raiseload('*'),
+        ).filter(
             PurchaseOrder.order_date >= cutoff_date
         )
 
@@ -49,6 +57,83 @@ class OrderService:
 
         return q.order_by(PurchaseOrder.order_date.desc()).offset(skip).limit(limit).all()
 
+    def get_order_rows(
+        self,
+        status: Optional[str] = None,
+        supplier_id: Optional[str] = None,
+        days: int = 90,
+        skip: int = 0,
+        limit: int = 50,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[RowMapping]:
+        """
+        Same filtering as get_orders, returned as plain column mappings.
+        Supplier name and line item count are resolved in the same query.
+
+        Rows are ordered newest first by (order_date, po_number); pass those
+        values from the last row of the previous page as `after` for keyset
+        pagination.
+        """
+        stmt = self.order_rows_query(status, supplier_id, days, skip, limit, after)
+
+        return self.db.execute(stmt).mappings().all()
+
+    @staticmethod
+    def order_rows_query(
+        status: Optional[str] = None,
+        supplier_id: Optional[str] = None,
+        days: int = 90,
+        skip: int = 0,
+        limit: int = 50,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> Select:
+        """Statement behind get_order_rows (also executed by async endpoints)"""
+        cutoff_date = datetime.now() - timedelta(days=days)
+
+        item_count = (
+            select(func.count(PurchaseOrderItem.po_item_id))
+            .where(PurchaseOrderItem.po_number == PurchaseOrder.po_number)
+            .correlate(PurchaseOrder)
+            .scalar_subquery()
+        )
+
+        stmt = (
+            select(
+                PurchaseOrder.po_number,
+                PurchaseOrder.supplier_id,
+                Supplier.supplier_name,
+                PurchaseOrder.order_date,
+                PurchaseOrder.expected_delivery_date,
+                PurchaseOrder.actual_delivery_date,
+                cast(PurchaseOrder.total_cost, Float).label('total_cost'),
+                PurchaseOrder.status,
+                item_count.label('item_count'),
+                PurchaseOrder.created_by,
+                PurchaseOrder.created_at,
+            )
+            .outerjoin(Supplier, PurchaseOrder.supplier_id == Supplier.supplier_id)
+            .where(PurchaseOrder.order_date >= cutoff_date)
+        )
+
+        if status:
+            stmt = stmt.where(PurchaseOrder.status == status)
+
+        if supplier_id:
+            stmt = stmt.where(PurchaseOrder.supplier_id == supplier_id)
+
+        if after is not None:
+            last_date, last_po = after
+            stmt = stmt.where(
+                or_(
+                    PurchaseOrder.order_date < last_date,
+                    and_(PurchaseOrder.order_date == last_date, PurchaseOrder.po_number < last_po)
+                )
+            )
+
+        return stmt.order_by(
+            PurchaseOrder.order_date.desc(), PurchaseOrder.po_number.desc()
+        ).offset(skip).limit(limit)
+
     def get_order_details(self, po_number: str) -> Optional[Dict]:
         """
         Get full order details with line items.
@@ -56,20 +141,55 @@ class OrderService:
         Returns:
             Dict with order header and items, or None if not found
         """
-        order = self.db.query(PurchaseOrder).filter(
-            PurchaseOrder.po_number == po_number
-        ).first()
+        order = self.db.scalars(self.order_query(po_number)).first()
 
         if not order:
             return None
 
-        # Get line items with product details
-        items = self.db.query(PurchaseOrderItem, Product).join(
+        items = self.db.execute(self.order_items_query(po_number)).all()
+
+        return self.format_order_details(order, items)
+
+    @staticmethod
+    def order_query(po_number: str) -> Select:
+        """Order header with the supplier name joined in"""
+        return select(PurchaseOrder).options(
+            joinedload(PurchaseOrder.supplier).load_only(Supplier.supplier_name)
+        ).where(
+            PurchaseOrder.po_number == po_number
+        )
+
+    @staticmethod
+    def order_version_query(po_number: str) -> Select:
+        """
+        Cheap probe of the mutable parts of an order, for ETags
+        (orders have no updated_at column).
+        """
+        of_order = PurchaseOrderItem.po_number == PurchaseOrder.po_number
+
+        return select(
+            PurchaseOrder.status,
+            PurchaseOrder.expected_delivery_date,
+            PurchaseOrder.actual_delivery_date,
+            PurchaseOrder.total_cost,
+            select(func.count(PurchaseOrderItem.po_item_id)).where(of_order)
+            .scalar_subquery().label('item_count'),
+            select(func.sum(PurchaseOrderItem.quantity_received)).where(of_order)
+            .scalar_subquery().label('quantity_received'),
+        ).where(PurchaseOrder.po_number == po_number)
+
+    @staticmethod
+    def order_items_query(po_number: str) -> Select:
+        """Line items with product details"""
+        return select(PurchaseOrderItem, Product).join(
             Product, PurchaseOrderItem.asin == Product.asin
-        ).filter(
+        ).where(
             PurchaseOrderItem.po_number == po_number
-        ).all()
+        )
 
+    @staticmethod
+    def format_order_details(order: PurchaseOrder, items: List[Row]) -> Dict:
+        """Shape an order and its order_items_query rows for the API"""
         line_items = []
         for item, product in items:
             line_items.append({
@@ -123,9 +243,10 @@ class OrderService:
         if not supplier:
             raise ValueError(f"Supplier {supplier_id} not found")
 
-        # Generate PO number
+        # Generate PO number; the random suffix keeps concurrent approvals
+        # from colliding (30 chars, within po_number's String(50))
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        po_number = f"PO-{timestamp}"
+        po_number = f"PO-{timestamp}-{uuid4().hex[:12]}"
 
         # Calculate expected delivery if not provided
         if not expected_delivery_date:
@@ -3,7 +3,8 @@ Supplier service for supplier management operations.
 """
 from typing import List, Optional, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, cast, Float, Select
+from sqlalchemy.engine import RowMapping
 from database.models import Supplier, Product, PurchaseOrder
 
 
@@ -22,9 +23,95 @@ class SupplierService:
 
         return q.all()
 
+    def get_supplier_rows(
+        self,
+        active_only: bool = True,
+        skip: int = 0,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> List[RowMapping]:
+        """
+        Get a page of suppliers as plain column mappings (read-only listings).
+        Pass the last supplier_id of the previous page as `after` for keyset
+        pagination.
+        """
+        stmt = self.supplier_rows_query(active_only, skip, limit, after)
+
+        return self.db.execute(stmt).mappings().all()
+
+    @staticmethod
+    def supplier_rows_query(
+        active_only: bool = True,
+        skip: int = 0,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> Select:
+        """Statement behind get_supplier_rows (also executed by async endpoints)"""
+        stmt = select(
+            Supplier.supplier_id,
+            Supplier.supplier_name,
+            Supplier.contact_person,
+            Supplier.email,
+            Supplier.phone,
+            Supplier.city,
+            Supplier.country,
+            Supplier.payment_terms,
+            cast(Supplier.on_time_delivery_rate, Float).label('on_time_delivery_rate'),
+            cast(Supplier.quality_rating, Float).label('quality_rating'),
+            Supplier.is_active,
+        )
+
+        if active_only:
+            stmt = stmt.where(Supplier.is_active == True)
+
+        if after is not None:
+            stmt = stmt.where(Supplier.supplier_id > after)
+
+        return stmt.order_by(Supplier.supplier_id).offset(skip).limit(limit)
+
     def get_supplier_by_id(self, supplier_id: str) -> Optional[Supplier]:
         """Get supplier by ID"""
-        return self.db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first()
+        return self.db.scalars(self.supplier_query(supplier_id)).first()
+
+    @staticmethod
+    def supplier_query(supplier_id: str) -> Select:
+        """Statement behind get_supplier_by_id"""
+        return select(Supplier).where(Supplier.supplier_id == supplier_id)
+
+    @staticmethod
+    def supplier_version_query(supplier_id: str) -> Select:
+        """
+        Cheap probe of a supplier and its active products, for ETags.
+        Changes whenever the supplier or any active product is updated,
+        or a product is activated/deactivated.
+        """
+        active = (Product.supplier_id == supplier_id, Product.is_active.is_(True))
+
+        return select(
+            Supplier.updated_at,
+            select(func.max(Product.updated_at)).where(*active)
+            .scalar_subquery().label('products_updated_at'),
+            select(func.count()).where(*active)
+            .scalar_subquery().label('product_count'),
+        ).where(Supplier.supplier_id == supplier_id)
+
+    @staticmethod
+    def active_product_rows_query(supplier_id: str) -> Select:
+        """
+        Stock columns of a supplier's active products.
+        Filtered in SQL (idx_product_supplier_active) so inactive products
+        are never loaded.
+        """
+        return select(
+            Product.asin,
+            Product.title,
+            Product.brand,
+            Product.quantity_on_hand,
+            Product.quantity_available.label('quantity_available'),
+        ).where(
+            Product.supplier_id == supplier_id,
+            Product.is_active.is_(True)
+        ).order_by(Product.asin)
 
     def get_supplier_performance(self, supplier_id: str) -> Optional[Dict]:
         """
@@ -12,9 +12,11 @@ Usage:
 """
 
 import logging
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass, asdict
+import orjson
 import requests
 
 from sqlalchemy.orm import Session
@@ -78,6 +80,14 @@ class WorkflowResult:
     def to_dict(self) -> dict:
         return asdict(self)
 
+    def to_json_bytes(self) -> bytes:
+        """JSON encoding of to_dict(), straight from the dataclass (no dict copy)."""
+        return orjson.dumps(self, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC)
+
+
+class WorkflowCancelledError(Exception):
+    """Raised when a caller's cancel event stops a running workflow."""
+
 
 class WorkflowService:
     """
@@ -102,6 +112,7 @@ class WorkflowService:
         include_all_products: bool = False,
         auto_create_orders: bool = False,
         max_products: int = 50,  # Limit for performance
+        cancel: Optional[threading.Event] = None,
     ) -> WorkflowResult:
         """
         Run the complete supply chain optimization workflow.
@@ -111,6 +122,8 @@ class WorkflowService:
             include_all_products: If True, analyze all products; else only low-stock
             auto_create_orders: If True, actually create POs; else just recommendations
             max_products: Maximum products to analyze (for performance)
+            cancel: Optional event; once set, the workflow stops before the
+                next product with WorkflowCancelledError
         
         Returns:
             WorkflowResult with analysis and recommendations
@@ -124,9 +137,9 @@ class WorkflowService:
         if include_all_products:
             products = self.inventory_service.get_products(limit=max_products)
         else:
-            products = self.inventory_service.get_low_stock_products()
-            if len(products) > max_products:
-                products = products[:max_products]
+            products = list(
+                self.inventory_service.get_low_stock_products(limit=max_products)
+            )
         
         logger.info(f"✓ Loaded {len(products)} products")
         
@@ -142,6 +155,9 @@ class WorkflowService:
         analysis_results: List[ProductAnalysis] = []
         
         for i, product in enumerate(products):
+            if cancel is not None and cancel.is_set():
+                logger.info(f"Workflow cancelled after {i}/{len(products)} products")
+                raise WorkflowCancelledError()
             if i % 10 == 0:
                 logger.info(f"   Analyzing product {i+1}/{len(products)}: {product.asin}")
             analysis = await self._analyze_product(product, forecast_days)
@@ -164,7 +180,7 @@ class WorkflowService:
             logger.info(f"📝 Step 5: Creating purchase orders...")
             for rec in order_recommendations:
                 try:
-                    self._create_purchase_order(rec)
+                    self.create_purchase_order(rec)
                     logger.info(f"   ✓ Created PO for {rec['supplier_name']}")
                 except Exception as e:
                     logger.error(f"Failed to create order for {rec['supplier_id']}: {e}")
@@ -322,8 +338,13 @@ class WorkflowService:
         
         return recommendations
     
-    def _create_purchase_order(self, recommendation: Dict) -> Optional[PurchaseOrder]:
-        """Actually create a purchase order from recommendation."""
+    def create_purchase_order(self, recommendation: Dict) -> PurchaseOrder:
+        """
+        Create a purchase order from an order recommendation.
+
+        Raises:
+            ValueError: If the supplier or a product is not found
+        """
         items = [
             {
                 "asin": item["asin"],